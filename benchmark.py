@@ -0,0 +1,407 @@
+# benchmark.py
+
+"""
+Banco de pruebas de rendimiento de los conversores.
+
+Genera un corpus sintético y determinista (mismas páginas en cada ejecución,
+sin descargar nada) con PyMuPDF y Pillow:
+    text.pdf    páginas de texto
+    scan.pdf    páginas escaneadas (una imagen JPEG por página)
+    mixed.pdf   texto más una imagen por página
+    huge.pdf    planos A0 vectoriales
+    report.pdf  informe largo con títulos, párrafos y tablas (pdf_to_word con layout)
+    images/     JPEG y PNG sueltos para images_to_pdf
+    parts/      PDF pequeños para merge_pdfs
+
+Cada operación se ejecuta en un proceso nuevo y se mide el tiempo, las
+páginas por segundo, la memoria máxima (RSS) y los bytes de salida. Con
+--baseline se compara con una medición anterior guardada con --save-baseline
+y se termina con código 1 si alguna operación es más lenta, usa más memoria
+o genera más bytes que el margen permitido.
+
+Uso:
+    python benchmark.py [--scale 1] [--repeat 3] [--only pdf_to_jpg_text,...]
+                        [--save-baseline benchmark_baseline.json]
+                        [--baseline benchmark_baseline.json] [--tolerance 0.25]
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Semilla fija: el corpus es idéntico en cada ejecución
+CORPUS_SEED = 1234
+CORPUS_VERSION = 2
+
+WORDS = (
+    "factura importe cliente fecha pago total banco cuenta contrato cláusula "
+    "artículo anexo página documento firma sello registro entrada salida saldo"
+).split()
+
+# Diferencias absolutas por debajo de las cuales no se considera regresión
+# (en operaciones de milisegundos el ruido supera cualquier margen relativo)
+MIN_DELTA = {"seconds": 0.05, "peak_rss_mb": 10, "output_bytes": 0}
+
+# Páginas de cada documento con --scale 1
+CORPUS_PAGES = {"text": 60, "scan": 20, "mixed": 30, "huge": 2, "report": 1000, "images": 40, "parts": 50}
+
+def _random_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def _scan_image(rng: random.Random, width: int = 1240, height: int = 1754):
+    """Página "escaneada": texto en gris sobre fondo con ruido, a 150 DPI."""
+    from PIL import Image, ImageDraw
+
+    # Ruido generado con rng (Image.effect_noise no admite semilla)
+    noise = Image.frombytes("L", (width, height), rng.randbytes(width * height))
+    img = noise.point(lambda v: 235 + v // 16).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    for y in range(120, height - 120, 36):
+        draw.text((100, y), _random_text(rng, 14), fill=(30, 30, 30))
+    return img
+
+def _jpeg_bytes(img, quality: int = 85) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+def make_corpus(folder: str, scale: int = 1) -> dict:
+    """
+    Crea el corpus en `folder` (si ya existe con la misma versión y escala,
+    se reutiliza) y devuelve {nombre: (ruta, páginas)}.
+    """
+    import fitz  # PyMuPDF
+
+    pages = {name: count * scale for name, count in CORPUS_PAGES.items()}
+    # Tamaños fijos: huge mide páginas enormes y report un documento de 1000 páginas
+    pages["huge"] = CORPUS_PAGES["huge"]
+    pages["report"] = CORPUS_PAGES["report"]
+    corpus = {
+        "text": (os.path.join(folder, "text.pdf"), pages["text"]),
+        "scan": (os.path.join(folder, "scan.pdf"), pages["scan"]),
+        "mixed": (os.path.join(folder, "mixed.pdf"), pages["mixed"]),
+        "huge": (os.path.join(folder, "huge.pdf"), pages["huge"]),
+        "report": (os.path.join(folder, "report.pdf"), pages["report"]),
+        "images": (os.path.join(folder, "images"), pages["images"]),
+        "parts": (os.path.join(folder, "parts"), pages["parts"] * 2),
+    }
+    stamp_path = os.path.join(folder, "corpus.json")
+    stamp = {"version": CORPUS_VERSION, "seed": CORPUS_SEED, "scale": scale}
+    try:
+        with open(stamp_path, encoding="utf-8") as f:
+            if json.load(f) == stamp:
+                return corpus
+    except (OSError, ValueError):
+        pass
+
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(corpus["images"][0])
+    os.makedirs(corpus["parts"][0])
+    rng = random.Random(CORPUS_SEED)
+
+    with fitz.open() as doc:
+        for _ in range(pages["text"]):
+            page = doc.new_page()
+            page.insert_textbox(fitz.Rect(50, 50, 545, 790), _random_text(rng, 450), fontsize=10)
+        doc.save(corpus["text"][0], no_new_id=True)
+
+    with fitz.open() as doc:
+        for _ in range(pages["scan"]):
+            page = doc.new_page()
+            page.insert_image(page.rect, stream=_jpeg_bytes(_scan_image(rng)))
+        doc.save(corpus["scan"][0], no_new_id=True)
+
+    with fitz.open() as doc:
+        logo = _jpeg_bytes(_scan_image(rng, 400, 300))
+        for i in range(pages["mixed"]):
+            page = doc.new_page()
+            page.insert_textbox(fitz.Rect(50, 50, 545, 400), _random_text(rng, 200), fontsize=10)
+            # La mitad de las páginas repiten la misma imagen (logotipo)
+            image = logo if i % 2 else _jpeg_bytes(_scan_image(rng, 600, 400))
+            page.insert_image(fitz.Rect(100, 450, 500, 750), stream=image)
+        doc.save(corpus["mixed"][0], no_new_id=True)
+
+    with fitz.open() as doc:
+        for _ in range(pages["huge"]):
+            page = doc.new_page(width=2384, height=3370)  # A0
+            for y in range(0, 3370, 20):
+                page.draw_line((0, y), (2384, 3370 - y), width=0.5)
+                page.insert_text((30, y + 15), _random_text(rng, 40), fontsize=9)
+        doc.save(corpus["huge"][0], no_new_id=True)
+
+    with fitz.open() as doc:
+        for i in range(pages["report"]):
+            page = doc.new_page()
+            page.insert_text((50, 70), f"{i + 1}. " + _random_text(rng, 4).capitalize(), fontsize=16,
+                             fontname="hebo")
+            y = 100
+            for _ in range(4):
+                page.insert_textbox(fitz.Rect(50, y, 545, y + 110), _random_text(rng, 80), fontsize=10)
+                y += 120
+            # Una de cada cuatro páginas lleva una tabla con bordes
+            if i % 4 == 0:
+                for row in range(5):
+                    for column in range(4):
+                        cell = fitz.Rect(50 + column * 120, y + row * 18, 170 + column * 120, y + (row + 1) * 18)
+                        page.draw_rect(cell, width=0.5)
+                        page.insert_text((cell.x0 + 4, cell.y1 - 5), _random_text(rng, 2), fontsize=9)
+        doc.save(corpus["report"][0], no_new_id=True)
+
+    for i in range(pages["images"]):
+        img = _scan_image(rng, 1240, 1754)
+        if i % 4:
+            img.save(os.path.join(corpus["images"][0], f"img_{i:04d}.jpg"), "JPEG", quality=85)
+        else:
+            img.convert("L").save(os.path.join(corpus["images"][0], f"img_{i:04d}.png"))
+
+    for i in range(pages["parts"]):
+        with fitz.open() as doc:
+            for _ in range(2):
+                page = doc.new_page()
+                page.insert_textbox(fitz.Rect(50, 50, 545, 790), _random_text(rng, 200), fontsize=10)
+            doc.save(os.path.join(corpus["parts"][0], f"part_{i:04d}.pdf"), no_new_id=True)
+
+    with open(stamp_path, "w", encoding="utf-8") as f:
+        json.dump(stamp, f)
+    return corpus
+
+def _operations(corpus: dict) -> dict:
+    """
+    {nombre: (páginas procesadas, función(carpeta de salida))}. Las funciones
+    importan los conversores al ejecutarse, dentro del proceso de la medición.
+    """
+    def pdf_to_jpg(name, **kwargs):
+        def run(output):
+            from pdf_to_jpg import pdf_to_jpg
+            pdf_to_jpg(corpus[name][0], output, **kwargs)
+        return corpus[name][1], run
+
+    def pdf_to_word(name, **kwargs):
+        def run(output):
+            from pdf_to_word import pdf_to_word
+            pdf_to_word(corpus[name][0], output, **kwargs)
+        return corpus[name][1], run
+
+    def ocr_raster(mode, preprocess=False):
+        # Solo el rasterizado (y preprocesado) de las páginas que irían a OCR,
+        # sin Tesseract: "rgb72" es el get_pixmap() que se usaba antes,
+        # "rgb300" un DPI fijo en color, "adaptive" el rasterizado de
+        # pdf_to_word y "embedded" la decodificación directa del escaneo
+        def run(output):
+            import fitz
+            from PIL import Image
+            from pdf_to_word import _ocr_pixmap, full_page_image, _embedded_ocr_size, _decode_for_ocr
+            from ocr_preprocess import preprocess as preprocess_image
+            with fitz.open(corpus["scan"][0]) as pdf_document:
+                for page in pdf_document:
+                    if mode == "embedded":
+                        info = full_page_image(page)
+                        image_bytes = pdf_document.extract_image(info["xref"])["image"]
+                        img = _decode_for_ocr(image_bytes, _embedded_ocr_size(page, info))
+                    elif mode == "adaptive":
+                        pix = _ocr_pixmap(page)
+                        img = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+                    else:
+                        pix = page.get_pixmap(dpi=72 if mode == "rgb72" else 300)
+                        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+                    if preprocess:
+                        img = preprocess_image(img, binarize_image=True, deskew_image=True)
+        return corpus["scan"][1], run
+
+    def images_to_pdf(**kwargs):
+        def run(output):
+            from image_to_pdf import images_to_pdf
+            images_to_pdf(corpus["images"][0], os.path.join(output, "images.pdf"), **kwargs)
+        return corpus["images"][1], run
+
+    def merge():
+        def run(output):
+            from merge_pdfs import merge_pdfs
+            folder = corpus["parts"][0]
+            merge_pdfs([os.path.join(folder, f) for f in sorted(os.listdir(folder))],
+                       os.path.join(output, "merged.pdf"))
+        return corpus["parts"][1], run
+
+    def extract():
+        def run(output):
+            from extract_pages import extract_pages_from_pdf
+            extract_pages_from_pdf(corpus["text"][0], os.path.join(output, "extract.pdf"), 1, corpus["text"][1])
+        return corpus["text"][1], run
+
+    def split():
+        def run(output):
+            from extract_pages import split_pdf
+            split_pdf(corpus["text"][0], output, every=5)
+        return corpus["text"][1], run
+
+    return {
+        "pdf_to_jpg_text": pdf_to_jpg("text", dpi=150),
+        "pdf_to_jpg_scan": pdf_to_jpg("scan", dpi=150),
+        "pdf_to_jpg_huge": pdf_to_jpg("huge", dpi=150),
+        "pdf_to_word_text": pdf_to_word("text"),
+        "pdf_to_word_mixed": pdf_to_word("mixed"),
+        "pdf_to_word_report": pdf_to_word("report"),
+        "pdf_to_word_report_layout": pdf_to_word("report", layout=True),
+        "ocr_raster_rgb72": ocr_raster("rgb72"),
+        "ocr_raster_rgb300": ocr_raster("rgb300"),
+        "ocr_raster_adaptive": ocr_raster("adaptive"),
+        "ocr_raster_adaptive_preprocess": ocr_raster("adaptive", preprocess=True),
+        "ocr_raster_embedded": ocr_raster("embedded"),
+        "images_to_pdf": images_to_pdf(),
+        "images_to_pdf_streaming": images_to_pdf(streaming=True),
+        "merge_pdfs": merge(),
+        "extract_pages": extract(),
+        "split_pdf": split(),
+    }
+
+def _peak_rss_mb():
+    """Memoria máxima (RSS) del proceso actual en MB, o None si no se puede medir."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # En Linux se da en KB y en macOS en bytes
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+def _folder_bytes(folder: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, file))
+        for root, _, files in os.walk(folder) for file in files
+    )
+
+def run_one(name: str, corpus_folder: str, scale: int) -> dict:
+    """Ejecuta una operación en este proceso y devuelve sus medidas."""
+    import dialogs
+
+    messages = []
+    dialogs.set_handler(lambda level, title, message: messages.append((level, message)))
+    pages, run = _operations(make_corpus(corpus_folder, scale))[name]
+    with tempfile.TemporaryDirectory() as output:
+        start = time.perf_counter()
+        run(output)
+        seconds = time.perf_counter() - start
+        output_bytes = _folder_bytes(output)
+
+    errors = [message for level, message in messages if level in ("error", "warning")]
+    return {
+        "seconds": seconds,
+        "pages": pages,
+        "pages_per_sec": pages / seconds if seconds else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "output_bytes": output_bytes,
+        "errors": errors,
+    }
+
+def measure(name: str, corpus_folder: str, scale: int, repeat: int) -> dict:
+    """
+    Ejecuta la operación `repeat` veces, cada una en un intérprete nuevo, y
+    se queda con la más rápida (la memoria es la máxima de todas).
+    """
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, __file__, "--run-one", name, "--corpus", corpus_folder, "--scale", str(scale)],
+            cwd=HERE, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"{name}: {result.stderr.strip()}")
+        current = json.loads(result.stdout.strip().splitlines()[-1])
+        if best is None:
+            best = current
+        else:
+            peak = max(best["peak_rss_mb"] or 0, current["peak_rss_mb"] or 0) or None
+            if current["seconds"] < best["seconds"]:
+                best = current
+            best["peak_rss_mb"] = peak
+    return best
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Lista de regresiones (textos) respecto a la medición de referencia."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric, label in (("seconds", "tiempo"), ("peak_rss_mb", "memoria"), ("output_bytes", "bytes")):
+            if not previous.get(metric) or current.get(metric) is None:
+                continue
+            change = current[metric] / previous[metric] - 1
+            if change > tolerance and current[metric] - previous[metric] > MIN_DELTA[metric]:
+                regressions.append(
+                    f"{name}: {label} {previous[metric]:.4g} -> {current[metric]:.4g} (+{change * 100:.0f}%)"
+                )
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Banco de pruebas de rendimiento de los conversores.")
+    parser.add_argument("--scale", type=int, default=1, help="Multiplicador del tamaño del corpus (por defecto 1).")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Repeticiones por operación; se toma la más rápida (por defecto 3).")
+    parser.add_argument("--only", default=None, help="Operaciones a medir, separadas por comas.")
+    parser.add_argument("--corpus", default=None,
+                        help="Carpeta del corpus (por defecto, una carpeta temporal reutilizable).")
+    parser.add_argument("--baseline", default=None, help="JSON de referencia con el que comparar.")
+    parser.add_argument("--save-baseline", default=None, help="Guardar las medidas como nueva referencia.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Empeoramiento permitido respecto a la referencia (por defecto 0.25 = 25%%).")
+    parser.add_argument("--run-one", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    corpus_folder = args.corpus or os.path.join(tempfile.gettempdir(), f"pdf_converter_bench_{args.scale}")
+
+    if args.run_one:
+        print(json.dumps(run_one(args.run_one, corpus_folder, args.scale)))
+        return 0
+
+    corpus = make_corpus(corpus_folder, args.scale)
+    names = list(_operations(corpus))
+    if args.only:
+        names = [name for name in args.only.split(",") if name in names]
+
+    print(f"{'operación':<32} {'s':>8} {'pág/s':>9} {'RSS (MB)':>9} {'salida (KB)':>12}")
+    results = {}
+    failed = False
+    for name in names:
+        result = measure(name, corpus_folder, args.scale, args.repeat)
+        results[name] = result
+        rss = f"{result['peak_rss_mb']:.0f}" if result["peak_rss_mb"] is not None else "-"
+        print(f"{name:<32} {result['seconds']:>8.3f} {result['pages_per_sec']:>9.1f} {rss:>9} "
+              f"{result['output_bytes'] / 1024:>12.0f}")
+        for error in result["errors"]:
+            failed = True
+            print(f"  ERROR: {error}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"scale": args.scale, "results": results}, f, indent=2)
+        print(f"\nReferencia guardada en {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != args.scale:
+            print(f"\nERROR: la referencia se midió con --scale {baseline.get('scale')}.")
+            return 1
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            failed = True
+            print(f"\nERROR: regresiones respecto a {args.baseline} (margen {args.tolerance * 100:.0f}%):")
+            for regression in regressions:
+                print(f"  {regression}")
+        else:
+            print(f"\nSin regresiones respecto a {args.baseline}.")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# checkpoint.py
+
+"""
+Puntos de control para reanudar conversiones largas.
+
+Un checkpoint es un archivo JSON Lines en la carpeta de salida: la primera
+línea es una cabecera que identifica la conversión (hash del PDF de entrada y
+parámetros) y cada línea siguiente registra una página terminada. Se escribe
+solo añadiendo líneas, así que una interrupción a mitad de escritura solo
+puede perder la última línea (que se descarta al leer).
+"""
+
+import json
+import os
+
+class Checkpoint:
+    """
+    Registro de páginas terminadas de una conversión.
+
+        checkpoint = Checkpoint(path, {"source": digest, "dpi": 300})
+        checkpoint.records   # {número de página: datos} de ejecuciones anteriores
+        checkpoint.add(page_number, bytes=1234)
+
+    Si la cabecera guardada no coincide con la actual (otro PDF u otros
+    parámetros), el registro anterior se descarta y se empieza de cero.
+    """
+
+    def __init__(self, path: str, header: dict):
+        self.path = path
+        self.header = header
+        self.records = self._load()
+
+        # Se reescribe el archivo limpio (sin una posible línea incompleta) y
+        # después se sigue añadiendo
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for data in [self.header] + [{"page": n, **r} for n, r in self.records.items()]:
+                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _read_lines(self) -> list:
+        lines = []
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        lines.append(json.loads(line))
+                    except ValueError:
+                        break  # Última línea incompleta
+        except OSError:
+            pass
+        return lines
+
+    def _load(self) -> dict:
+        lines = self._read_lines()
+        if not lines or lines[0] != self.header:
+            return {}
+        return {record.pop("page"): record for record in lines[1:]}
+
+    def _write(self, data: dict) -> None:
+        self._file.write(json.dumps(data, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def add(self, page_number: int, **data) -> None:
+        """Registra una página terminada."""
+        self.records[page_number] = data
+        self._write({"page": page_number, **data})
+
+    def close(self) -> None:
+        self._file.close()
+
+    def remove(self) -> None:
+        """Elimina el checkpoint (la conversión ha terminado)."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
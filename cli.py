@@ -0,0 +1,405 @@
+# cli.py
+
+"""
+Línea de comandos (sin interfaz gráfica) para los conversores.
+
+Uso:
+    python -m cli img-to-pdf  CARPETAS/IMÁGENES... -o CARPETA_SALIDA [--streaming]
+    python -m cli pdf-to-word PDFS...   -o CARPETA_SALIDA [--ocr] [--layout] [--resume]
+    python -m cli pdf-to-searchable PDFS... -o CARPETA_SALIDA [--ocr-workers N] [--ocr-cache]
+    python -m cli pdf-to-jpg  PDFS...   -o CARPETA_SALIDA [--dpi 300] [--workers N] [--resume]
+                                        [--format webp] [--color auto] [--quality 80]
+    python -m cli pdf-to-tiff PDFS...   -o CARPETA_SALIDA [--dpi 600] [--strip-height 256] [--tiles]
+    python -m cli extract     PDFS...   -o CARPETA_SALIDA --start 1 --end 5
+    python -m cli split       PDFS...   -o CARPETA_SALIDA (--ranges 1-5,8 | --every 5 | --bookmarks)
+    python -m cli merge       PDFS...   -o SALIDA.pdf [--streaming] [--max-memory-mb 500] [--dedup]
+
+img-to-pdf, pdf-to-word, pdf-to-searchable y pdf-to-jpg admiten --trace TRAZA.json (o .csv): se
+guarda el tiempo de cada etapa por página y se escribe en stderr un resumen
+con las etapas más costosas y las páginas más lentas.
+
+Las entradas pueden ser rutas, patrones glob ("facturas/**/*.pdf") o carpetas.
+Con --jobs N se procesan N archivos a la vez. Cada archivo procesado escribe
+una línea JSON en stdout y al final se escribe un resumen. Código de salida:
+0 si todo fue bien, 1 si falló algún archivo, 2 si no hay entradas válidas.
+"""
+
+import argparse
+import contextlib
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import dialogs
+
+PDF_EXTENSIONS = ['.pdf']
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.gif']
+
+def expand_inputs(patterns: list, extensions: list, expand_dirs: bool = True) -> list:
+    """
+    Expande rutas, patrones glob y carpetas en una lista ordenada de rutas sin
+    duplicados. Si expand_dirs = True, de cada carpeta se toman los archivos
+    con alguna de las extensiones indicadas; si no, la carpeta es la entrada.
+    """
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            if os.path.isdir(match) and expand_dirs:
+                paths.extend(
+                    os.path.join(match, file)
+                    for file in sorted(os.listdir(match))
+                    if os.path.splitext(file)[1].lower() in extensions
+                )
+            elif os.path.isdir(match) or os.path.splitext(match)[1].lower() in extensions:
+                paths.append(match)
+
+    seen = set()
+    return [p for p in paths if not (p in seen or seen.add(p))]
+
+def _output_for(command: str, input_path: str, output: str, options: dict) -> str:
+    """Ruta de salida que se informa (y se usa) para cada entrada."""
+    name = os.path.splitext(os.path.basename(os.path.normpath(input_path)))[0]
+    if command == "img-to-pdf":
+        return os.path.join(output, f"{name}.pdf")
+    if command == "pdf-to-word":
+        return os.path.join(output, f"{name}.docx")
+    if command == "pdf-to-searchable":
+        return os.path.join(output, f"{name}_ocr.pdf")
+    if command == "extract":
+        return os.path.join(output, f"{name}_p{options['start']}-{options['end']}.pdf")
+    return output
+
+def _result_cache(options: dict):
+    """Caché de resultados según las opciones --cache/--cache-dir (o None)."""
+    if not (options.get("cache") or options.get("cache_dir")):
+        return None
+    from result_cache import ResultCache
+    return ResultCache(options["cache_dir"], max_bytes=options["cache_max_mb"] * 1024 ** 2)
+
+def _ocr_cache(options: dict):
+    """Caché de OCR por página según la opción --ocr-cache (o None)."""
+    if not options.get("ocr_cache"):
+        return None
+    from ocr_cache import OcrCache, OCR_CACHE_FILENAME
+    from result_cache import default_cache_dir
+    return OcrCache(os.path.join(options.get("cache_dir") or default_cache_dir(), OCR_CACHE_FILENAME))
+
+def _convert(command: str, input_path, output_path: str, options: dict, tracer=None,
+             cache=None, ocr_cache=None) -> None:
+    """Llama a la función de conversión correspondiente (con las cachés de run_job)."""
+    if command == "img-to-pdf":
+        from image_to_pdf import images_to_pdf
+        images_to_pdf(input_path, output_path, streaming=options["streaming"],
+                      passthrough=options["passthrough"], tracer=tracer)
+    elif command == "pdf-to-word":
+        from pdf_to_word import pdf_to_word
+        pdf_to_word(input_path, os.path.dirname(output_path), options["ocr"],
+                    ocr_workers=options["ocr_workers"], cache=cache,
+                    ocr_cache=ocr_cache, resume=options["resume"], tracer=tracer,
+                    ocr_binarize=options["ocr_binarize"], ocr_deskew=options["ocr_deskew"],
+                    ocr_embedded=options["ocr_embedded"], layout=options["layout"])
+    elif command == "pdf-to-searchable":
+        from searchable_pdf import pdf_to_searchable_pdf
+        pdf_to_searchable_pdf(input_path, os.path.dirname(output_path), ocr_workers=options["ocr_workers"],
+                              ocr_cache=ocr_cache, ocr_embedded=options["ocr_embedded"], tracer=tracer)
+    elif command == "pdf-to-jpg":
+        from pdf_to_jpg import pdf_to_jpg
+        from encoders import encoder_options
+        pdf_to_jpg(input_path, output_path, dpi=options["dpi"], workers=options["workers"],
+                   cache=cache, resume=options["resume"],
+                   fmt=options["format"], color_mode=options["color"], multipage=options["multipage"],
+                   extra_dpis=options["extra_dpi"], thumbnail_size=options["thumbnail"], tracer=tracer,
+                   encoder_options=encoder_options(
+                       options["format"], quality=options["quality"], progressive=options["progressive"],
+                       optimize=options["optimize"], subsampling=options["subsampling"],
+                       lossless=options["lossless"], compress_level=options["compress_level"],
+                   ))
+    elif command == "pdf-to-tiff":
+        from tiled_render import pdf_to_tiff
+        pdf_to_tiff(input_path, output_path, dpi=options["dpi"], strip_height=options["strip_height"],
+                    grayscale=options["grayscale"], tiles=options["tiles"], tile_size=options["tile_size"])
+    elif command == "extract":
+        from extract_pages import extract_pages_from_pdf
+        extract_pages_from_pdf(input_path, output_path, options["start"], options["end"])
+    elif command == "split":
+        from extract_pages import split_pdf, parse_ranges
+        ranges = parse_ranges(options["ranges"]) if options["ranges"] else None
+        split_pdf(input_path, output_path, ranges=ranges, every=options["every"],
+                  bookmarks=options["bookmarks"], workers=options["workers"])
+    elif command == "merge":
+        if options["streaming"] or options["max_memory_mb"] or options["dedup"]:
+            from merge_pdfs import merge_pdfs_large
+            merge_pdfs_large(input_path, output_path, flush_every=options["flush_every"],
+                             max_memory_mb=options["max_memory_mb"], deduplicate=options["dedup"])
+        else:
+            from merge_pdfs import merge_pdfs
+            merge_pdfs(input_path, output_path)
+
+def run_job(command: str, input_path, output_path: str, options: dict) -> dict:
+    """
+    Ejecuta una conversión sin diálogos y devuelve un resultado serializable.
+    Los avisos se recogen en "messages"; cualquier error o advertencia marca
+    el resultado como fallido. Lo que las funciones imprimen va a stderr para
+    no mezclarse con la salida estructurada. Con la opción trace, los
+    registros de la traza se devuelven en "trace", y con cachés, los aciertos
+    y fallos de esta conversión en "cache" y "ocr_cache".
+    """
+    tracer = None
+    if options.get("trace"):
+        from tracing import Tracer
+        tracer = Tracer(os.path.basename(os.path.normpath(input_path)))
+    messages = []
+    previous = dialogs.set_handler(
+        lambda level, title, message: messages.append(
+            {"level": level, "title": title, "message": message}
+        )
+    )
+    start = time.perf_counter()
+    cache = ocr_cache = None
+    try:
+        cache = _result_cache(options)
+        ocr_cache = _ocr_cache(options)
+        with contextlib.redirect_stdout(sys.stderr):
+            _convert(command, input_path, output_path, options, tracer, cache, ocr_cache)
+    except Exception as e:
+        messages.append({"level": "error", "title": type(e).__name__, "message": str(e)})
+    finally:
+        dialogs.set_handler(previous)
+        if ocr_cache is not None:
+            ocr_cache.close()
+
+    failed = any(m["level"] in ("error", "warning") for m in messages)
+    result = {
+        "command": command,
+        "input": input_path,
+        "output": output_path,
+        "status": "error" if failed else "ok",
+        "seconds": round(time.perf_counter() - start, 3),
+        "messages": messages,
+    }
+    if cache is not None:
+        result["cache"] = cache.counters()
+    if ocr_cache is not None:
+        result["ocr_cache"] = {"hits": ocr_cache.hits, "misses": ocr_cache.misses}
+    if tracer is not None:
+        result["trace"] = [tuple(record) for record in tracer.records]
+    return result
+
+def _run_counters(results: list, name: str, keys: tuple) -> dict:
+    """
+    Aciertos y fallos de la caché `name` en esta ejecución: la suma de los de
+    cada archivo (stats() de la caché incluye los de otras ejecuciones).
+    """
+    return {key: sum(result.get(name, {}).get(key, 0) for result in results) for key in keys}
+
+def _emit(result: dict) -> None:
+    print(json.dumps(result, ensure_ascii=False), flush=True)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m cli",
+        description="Conversores de PDF e imágenes sin interfaz gráfica.",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Mostrar información de progreso en stderr.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_command(name, help_text, output_help):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("inputs", nargs="+", help="Rutas, patrones glob o carpetas.")
+        sub.add_argument("-o", "--output", required=True, help=output_help)
+        if name != "merge":
+            sub.add_argument("-j", "--jobs", type=int, default=1,
+                             help="Archivos a procesar en paralelo (por defecto 1).")
+        return sub
+
+    def add_resume_option(sub):
+        sub.add_argument("--resume", action="store_true",
+                         help="Registrar el progreso en la carpeta de salida y reanudar "
+                              "conversiones interrumpidas sin repetir páginas.")
+
+    def add_trace_option(sub):
+        sub.add_argument("--trace", default=None, metavar="TRAZA.json",
+                         help="Guardar el tiempo de cada etapa por página (JSON, o CSV si termina en .csv) "
+                              "y mostrar un resumen en stderr.")
+
+    def add_cache_options(sub):
+        sub.add_argument("--cache", action="store_true",
+                         help="Reutilizar resultados de conversiones anteriores del mismo PDF.")
+        sub.add_argument("--cache-dir", default=None,
+                         help="Carpeta de la caché (implica --cache).")
+        sub.add_argument("--cache-max-mb", type=int, default=2048,
+                         help="Tamaño máximo de la caché en MB (por defecto 2048).")
+
+    sub = add_command("img-to-pdf", "Convertir carpetas de imágenes (o imágenes sueltas) a PDF.",
+                      "Carpeta donde guardar los PDF.")
+    sub.add_argument("--streaming", action="store_true",
+                     help="Escribir las páginas de una en una (memoria acotada).")
+    sub.add_argument("--no-passthrough", dest="passthrough", action="store_false",
+                     help="Recomprimir también los JPEG con Pillow.")
+    add_trace_option(sub)
+
+    sub = add_command("pdf-to-word", "Convertir PDF a Word (.docx).", "Carpeta donde guardar los .docx.")
+    sub.add_argument("--ocr", action="store_true", help="Aplicar OCR a las páginas sin texto.")
+    sub.add_argument("--layout", action="store_true",
+                     help="Conservar la estructura: un párrafo por bloque de texto, títulos y tablas.")
+    sub.add_argument("--ocr-workers", type=int, default=None,
+                     help="Hilos de OCR por archivo (por defecto, uno por núcleo).")
+    sub.add_argument("--ocr-binarize", action="store_true",
+                     help="Pasar las páginas a blanco y negro (umbral de Otsu) antes del OCR.")
+    sub.add_argument("--ocr-deskew", action="store_true",
+                     help="Enderezar las páginas escaneadas torcidas antes del OCR (necesita NumPy).")
+    sub.add_argument("--ocr-render-pages", dest="ocr_embedded", action="store_false",
+                     help="Rasterizar siempre la página para el OCR, también cuando es un único "
+                          "escaneo (por defecto se usa directamente la imagen incrustada).")
+    add_cache_options(sub)
+    sub.add_argument("--ocr-cache", action="store_true",
+                     help="Reutilizar el OCR de páginas ya reconocidas (SQLite en la carpeta de caché).")
+    add_resume_option(sub)
+    add_trace_option(sub)
+
+    sub = add_command("pdf-to-searchable",
+                      "Añadir a los PDF escaneados una capa de texto invisible (OCR) para buscar y copiar.",
+                      "Carpeta donde guardar los PDF (NOMBRE_ocr.pdf).")
+    sub.add_argument("--ocr-workers", type=int, default=None,
+                     help="Hilos de OCR por archivo (por defecto, uno por núcleo).")
+    sub.add_argument("--ocr-render-pages", dest="ocr_embedded", action="store_false",
+                     help="Rasterizar siempre la página para el OCR, también cuando es un único "
+                          "escaneo (por defecto se usa directamente la imagen incrustada).")
+    sub.add_argument("--ocr-cache", action="store_true",
+                     help="Reutilizar el OCR de páginas ya reconocidas (SQLite en la carpeta de caché).")
+    add_trace_option(sub)
+
+    sub = add_command("pdf-to-jpg", "Convertir cada página de un PDF a JPG.", "Carpeta donde guardar los JPG.")
+    sub.add_argument("--dpi", type=int, default=300, help="Resolución de salida (por defecto 300).")
+    sub.add_argument("--workers", type=int, default=1, help="Procesos por archivo (por defecto 1).")
+    sub.add_argument("--format", default="jpg", choices=["jpg", "webp", "png", "tiff-g4", "avif"],
+                     help="Formato de salida (por defecto jpg).")
+    sub.add_argument("--color", default="rgb", choices=["rgb", "auto", "gray", "bitonal"],
+                     help="Reducir a gris o blanco y negro; auto lo detecta por página (por defecto rgb).")
+    sub.add_argument("--quality", type=int, default=None, help="Calidad (jpg, webp, avif).")
+    sub.add_argument("--progressive", action="store_true", default=None, help="JPEG progresivo.")
+    sub.add_argument("--optimize", action="store_true", default=None, help="Optimizar tablas Huffman (jpg) o filtros (png).")
+    sub.add_argument("--subsampling", choices=["4:4:4", "4:2:2", "4:2:0"], default=None,
+                     help="Submuestreo de color del JPEG.")
+    sub.add_argument("--lossless", action="store_true", default=None, help="WebP sin pérdida.")
+    sub.add_argument("--compress-level", type=int, default=None, help="Nivel de compresión PNG (0-9).")
+    sub.add_argument("--multipage", action="store_true",
+                     help="Con tiff-g4, juntar las páginas en un único TIFF multipágina.")
+    sub.add_argument("--extra-dpi", type=int, action="append", default=None,
+                     help="Generar también una versión a este DPI (repetible), reducida en memoria "
+                          "desde el mismo renderizado.")
+    sub.add_argument("--thumbnail", type=int, default=None,
+                     help="Generar también una miniatura con este lado mayor en píxeles.")
+    add_cache_options(sub)
+    add_resume_option(sub)
+    add_trace_option(sub)
+
+    sub = add_command("pdf-to-tiff", "Exportar páginas a muy alta resolución con memoria acotada (por franjas).",
+                      "Carpeta donde guardar los TIFF o las teselas.")
+    sub.add_argument("--dpi", type=int, default=600, help="Resolución de salida (por defecto 600).")
+    sub.add_argument("--strip-height", type=int, default=256,
+                     help="Filas por franja; la memoria depende de este valor (por defecto 256).")
+    sub.add_argument("--grayscale", action="store_true", help="TIFF en escala de grises.")
+    sub.add_argument("--tiles", action="store_true",
+                     help="Generar una pirámide de teselas JPG por página en lugar de un TIFF.")
+    sub.add_argument("--tile-size", type=int, default=256, help="Tamaño de tesela en píxeles (por defecto 256).")
+
+    sub = add_command("extract", "Extraer un rango de páginas de cada PDF.", "Carpeta donde guardar los PDF.")
+    sub.add_argument("--start", type=int, required=True, help="Página inicial (base 1).")
+    sub.add_argument("--end", type=int, required=True, help="Página final (base 1).")
+
+    sub = add_command("split", "Dividir cada PDF en varios documentos en una sola pasada.",
+                      "Carpeta donde guardar los PDF.")
+    rule = sub.add_mutually_exclusive_group(required=True)
+    rule.add_argument("--ranges", help='Rangos de páginas, por ejemplo "1-5,8,10-12".')
+    rule.add_argument("--every", type=int, help="Un documento cada N páginas.")
+    rule.add_argument("--bookmarks", action="store_true", help="Un documento por marcador de primer nivel.")
+    sub.add_argument("--workers", type=int, default=1, help="Procesos por archivo (por defecto 1).")
+
+    sub = add_command("merge", "Unir varios PDF en uno.", "Ruta del PDF resultante.")
+    sub.add_argument("--streaming", action="store_true",
+                     help="Escribir el resultado por tramos (memoria acotada, miles de entradas).")
+    sub.add_argument("--flush-every", type=int, default=200,
+                     help="Archivos por tramo en modo streaming (por defecto 200).")
+    sub.add_argument("--max-memory-mb", type=int, default=None,
+                     help="Techo de memoria en MB: al superarlo se guarda el tramo (implica --streaming).")
+    sub.add_argument("--dedup", action="store_true",
+                     help="Eliminar fuentes y recursos duplicados al final (implica --streaming).")
+
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        stream=sys.stderr, format="%(levelname)s %(name)s: %(message)s",
+    )
+    command = args.command
+    options = {k: v for k, v in vars(args).items() if k not in ("command", "inputs", "output", "jobs", "verbose")}
+
+    if command == "img-to-pdf":
+        inputs = expand_inputs(args.inputs, IMAGE_EXTENSIONS, expand_dirs=False)
+    else:
+        inputs = expand_inputs(args.inputs, PDF_EXTENSIONS)
+
+    tracer = None
+    if options.get("trace"):
+        from tracing import Tracer
+        tracer = Tracer()
+
+    def emit_result(result):
+        # La traza no va en la línea JSON del archivo: se junta con las demás
+        if tracer is not None:
+            tracer.extend(result.pop("trace", []))
+        _emit(result)
+
+    if not inputs:
+        _emit({"summary": {"total": 0, "ok": 0, "failed": 0},
+               "error": "No se encontraron archivos de entrada."})
+        return 2
+
+    if command == "merge":
+        output_dir = os.path.dirname(os.path.abspath(args.output))
+        os.makedirs(output_dir, exist_ok=True)
+        results = [run_job(command, inputs, args.output, options)]
+        emit_result(results[0])
+    else:
+        os.makedirs(args.output, exist_ok=True)
+        jobs = [(command, path, _output_for(command, path, args.output, options), options) for path in inputs]
+        results = []
+        if args.jobs > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(args.jobs, len(jobs))) as executor:
+                futures = [executor.submit(run_job, *job) for job in jobs]
+                for future in as_completed(futures):
+                    results.append(future.result())
+                    emit_result(results[-1])
+        else:
+            for job in jobs:
+                results.append(run_job(*job))
+                emit_result(results[-1])
+
+    failed = sum(1 for r in results if r["status"] != "ok")
+    summary = {"total": len(results), "ok": len(results) - failed, "failed": failed}
+    cache = _result_cache(options)
+    if cache is not None:
+        summary["cache"] = _run_counters(results, "cache", ("hits", "misses", "bytes_saved"))
+        print(cache.report(summary["cache"]), file=sys.stderr)
+    ocr_cache = _ocr_cache(options)
+    if ocr_cache is not None:
+        summary["ocr_cache"] = _run_counters(results, "ocr_cache", ("hits", "misses"))
+        print(ocr_cache.report(summary["ocr_cache"]), file=sys.stderr)
+        ocr_cache.close()
+    if tracer is not None:
+        tracer.write(options["trace"])
+        print(tracer.summary(), file=sys.stderr)
+    _emit({"summary": summary})
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
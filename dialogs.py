@@ -0,0 +1,38 @@
+# dialogs.py
+
+"""
+Avisos de los conversores (información, advertencias y errores).
+
+Por defecto se muestran con tkinter.messagebox. Un programa sin pantalla
+(p. ej. la línea de comandos) puede instalar su propio manejador con
+set_handler() para recoger los mensajes en lugar de abrir diálogos.
+"""
+
+_handler = None
+
+def set_handler(handler):
+    """
+    Instala un manejador handler(level, title, message), con level igual a
+    "info", "warning" o "error". Con None se vuelve a los diálogos de Tk.
+    Devuelve el manejador anterior.
+    """
+    global _handler
+    previous, _handler = _handler, handler
+    return previous
+
+def _show(level: str, title: str, message: str) -> None:
+    if _handler is not None:
+        _handler(level, title, message)
+        return
+
+    from tkinter import messagebox
+    getattr(messagebox, f"show{level}")(title, message)
+
+def showinfo(title: str, message: str) -> None:
+    _show("info", title, message)
+
+def showwarning(title: str, message: str) -> None:
+    _show("warning", title, message)
+
+def showerror(title: str, message: str) -> None:
+    _show("error", title, message)
@@ -0,0 +1,271 @@
+# docx_layout.py
+
+"""
+Conversión a Word conservando la estructura de la página.
+
+pdf_to_word vuelca por defecto page.get_text() en un único párrafo por
+página. Con layout=True se usa este módulo:
+
+- extract_layout(page) lee page.get_text("dict") y devuelve los bloques de
+  texto de la página en orden de lectura: cada bloque es un párrafo (las
+  líneas se unen, se deshacen las palabras cortadas con guion y las líneas
+  que terminan mucho antes del margen se conservan como saltos de línea) con
+  el tamaño de letra dominante. Las tablas con bordes se detectan con
+  page.find_tables(), solo en las páginas con trazos suficientes y solo en la
+  zona de los trazos (find_tables cuesta decenas de ms por página completa).
+- BodyWriter escribe los bloques en el documento: los títulos (bloques
+  cortos con letra claramente mayor que la del cuerpo del documento) con los
+  estilos "Heading 1-3", los párrafos y las tablas. En lugar de una llamada a
+  python-docx por párrafo y por run, el XML (WordprocessingML) se genera como
+  texto y se analiza de una vez por tramos con lxml.
+
+Los bloques son tuplas serializables en JSON (se guardan en el checkpoint):
+    ("text", texto, tamaño de letra)
+    ("table", [[celda, ...], ...])
+"""
+
+import logging
+import re
+from collections import Counter
+from xml.sax.saxutils import escape
+
+import fitz  # PyMuPDF
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+
+logger = logging.getLogger(__name__)
+
+# Trazos (líneas o lados de rectángulo) a partir de los cuales se buscan tablas
+MIN_TABLE_RULES = 6
+# Una línea que termina antes de esta fracción del ancho del bloque cierra un
+# renglón (dirección, lista...) y se conserva el salto de línea
+SHORT_LINE_RATIO = 0.75
+# Un bloque es título si su letra es al menos HEADING_RATIOS[i] veces la del
+# cuerpo (nivel i + 1) y no pasa de HEADING_MAX_CHARS caracteres
+HEADING_RATIOS = (1.6, 1.3, 1.15)
+HEADING_MAX_CHARS = 150
+# Ancho de las tablas: el del texto en la plantilla de python-docx (6 pulgadas)
+TABLE_WIDTH_TWIPS = 8640
+# Caracteres de XML acumulados tras los que BodyWriter los inserta en el documento
+BULK_XML_CHARS = 1024 * 1024
+
+# get_text("dict") sin las imágenes (las incrusta pdf_to_word por su cuenta)
+_TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+# Caracteres no admitidos en XML 1.0 (aparecen en algunos PDF)
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_BREAKS = re.compile(r"(\n|\t)")
+
+def _ruled_area(page):
+    """
+    Rectángulo que abarca las líneas y rectángulos trazados en la página, o
+    None si no hay trazos suficientes para formar una tabla.
+    """
+    rules = 0
+    area = fitz.EMPTY_RECT()
+    for path in page.get_cdrawings():
+        path_rules = sum(4 if item[0] in ("re", "qu") else 1 if item[0] == "l" else 0 for item in path["items"])
+        if path_rules:
+            rules += path_rules
+            area |= path["rect"]
+    return area if rules >= MIN_TABLE_RULES else None
+
+def _find_tables(page) -> list:
+    """[(rectángulo, filas)] de las tablas de al menos 2x2 celdas de la página."""
+    area = _ruled_area(page)
+    if area is None:
+        return []
+    try:
+        # find_tables recorre en Python cada carácter de la zona: se limita a
+        # la de los trazos (con margen para la fila de cabecera)
+        found = page.find_tables(clip=(area + (-2, -20, 2, 2)) & page.rect)
+    except Exception as e:
+        logger.debug("find_tables falló en la página %d: %s", page.number + 1, e)
+        return []
+    tables = []
+    for table in found.tables:
+        if table.row_count >= 2 and table.col_count >= 2:
+            rows = [[cell or "" for cell in row] for row in table.extract()]
+            tables.append((table.bbox, rows))
+    return tables
+
+def _block_text(block) -> tuple:
+    """(texto, tamaño de letra dominante) de un bloque de get_text("dict")."""
+    x0, _, x1, _ = block["bbox"]
+    limit = x0 + (x1 - x0) * SHORT_LINE_RATIO
+    sizes = Counter()
+    text = ""
+    previous_end = None
+    for line in block["lines"]:
+        line_text = "".join(span["text"] for span in line["spans"]).strip()
+        if not line_text:
+            continue
+        for span in line["spans"]:
+            sizes[round(span["size"], 1)] += len(span["text"])
+        if previous_end is None:
+            text = line_text
+        elif previous_end < limit:
+            text += "\n" + line_text
+        elif text.endswith("-") and text[-2:-1].isalpha() and line_text[:1].islower():
+            text = text[:-1] + line_text
+        else:
+            text += " " + line_text
+        previous_end = line["bbox"][2]
+    size = sizes.most_common(1)[0][0] if sizes else 0
+    return text, size
+
+def extract_layout(page) -> list:
+    """Bloques ("text" y "table") de la página, en orden de lectura."""
+    tables = _find_tables(page)
+    table_rects = [fitz.Rect(bbox) for bbox, _ in tables]
+    placed = set()
+    blocks = []
+    for block in page.get_text("dict", flags=_TEXT_FLAGS)["blocks"]:
+        if block["type"] != 0:
+            continue
+        if table_rects:
+            bbox = fitz.Rect(block["bbox"])
+            center = (bbox.tl + bbox.br) / 2
+            inside = next((i for i, rect in enumerate(table_rects) if center in rect), None)
+            if inside is not None:
+                # La tabla ocupa el lugar de su primer bloque de texto
+                if inside not in placed:
+                    placed.add(inside)
+                    blocks.append(("table", tables[inside][1]))
+                continue
+        text, size = _block_text(block)
+        if text:
+            blocks.append(("text", text, size))
+    # Tablas sin texto reconocido dentro (celdas vacías o texto en curvas)
+    for i, (bbox, rows) in enumerate(tables):
+        if i not in placed and any(any(cell for cell in row) for row in rows):
+            blocks.append(("table", rows))
+    return blocks
+
+def layout_text(blocks: list) -> str:
+    """Texto plano de los bloques (para decidir si la página necesita OCR)."""
+    parts = []
+    for block in blocks:
+        if block[0] == "text":
+            parts.append(block[1])
+        else:
+            parts.extend("\t".join(row) for row in block[1])
+    return "\n".join(parts)
+
+def body_font_size(pages_blocks) -> float:
+    """Tamaño de letra con más caracteres en todo el documento (0 si no hay texto)."""
+    sizes = Counter()
+    for blocks in pages_blocks:
+        for block in blocks or ():
+            if block[0] == "text":
+                sizes[block[2]] += len(block[1])
+    return sizes.most_common(1)[0][0] if sizes else 0
+
+def heading_level(text: str, size: float, body_size: float) -> int:
+    """Nivel de título (1-3) de un bloque, o 0 si es un párrafo normal."""
+    if not body_size or len(text) > HEADING_MAX_CHARS:
+        return 0
+    for level, ratio in enumerate(HEADING_RATIOS, start=1):
+        if size >= body_size * ratio:
+            return level
+    return 0
+
+def _runs_xml(text: str) -> str:
+    """Un run con el texto; los saltos de línea y tabuladores como en python-docx."""
+    parts = []
+    for piece in _BREAKS.split(_INVALID_XML_CHARS.sub("", text)):
+        if piece == "\n":
+            parts.append("<w:br/>")
+        elif piece == "\t":
+            parts.append("<w:tab/>")
+        elif piece:
+            parts.append(f'<w:t xml:space="preserve">{escape(piece)}</w:t>')
+    return f"<w:r>{''.join(parts)}</w:r>" if parts else ""
+
+class BodyWriter:
+    """
+    Escribe párrafos, títulos y tablas al final del cuerpo del documento
+    (antes de sectPr, como doc.add_paragraph) a partir de XML generado como
+    texto. Antes de añadir contenido con python-docx (p. ej. imágenes) hay
+    que llamar a flush() para conservar el orden, y al terminar a finish().
+    """
+
+    def __init__(self, doc):
+        self.body = doc.element.body
+        self.heading_styles = [doc.styles[f"Heading {level}"].style_id for level in (1, 2, 3)]
+        self.table_style = doc.styles["Table Grid"].style_id
+        self._parts = []
+        self._size = 0
+        self._ends_with_table = False
+
+    def _add(self, xml: str, table: bool = False) -> None:
+        self._ends_with_table = table
+        self._parts.append(xml)
+        self._size += len(xml)
+        if self._size >= BULK_XML_CHARS:
+            self.flush()
+
+    def add_paragraph(self, text: str, style_id: str = None) -> None:
+        style = f'<w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>' if style_id else ""
+        self._add(f"<w:p>{style}{_runs_xml(text)}</w:p>")
+
+    def add_table(self, rows: list) -> None:
+        columns = max(len(row) for row in rows)
+        column_width = TABLE_WIDTH_TWIPS // columns
+        xml = [
+            f'<w:tbl><w:tblPr><w:tblStyle w:val="{self.table_style}"/><w:tblW w:type="auto" w:w="0"/>'
+            f'<w:tblLook w:val="04A0"/></w:tblPr><w:tblGrid>',
+            f'<w:gridCol w:w="{column_width}"/>' * columns,
+            "</w:tblGrid>",
+        ]
+        for row in rows:
+            xml.append("<w:tr>")
+            for cell in list(row) + [""] * (columns - len(row)):
+                xml.append(f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{column_width}"/></w:tcPr>'
+                           f"<w:p>{_runs_xml(cell)}</w:p></w:tc>")
+            xml.append("</w:tr>")
+        xml.append("</w:tbl>")
+        self._add("".join(xml), table=True)
+
+    def add_blocks(self, blocks: list, body_size: float) -> None:
+        """Bloques de extract_layout (con body_font_size del documento)."""
+        for block in blocks:
+            if block[0] == "table":
+                self.add_table(block[1])
+                continue
+            _, text, size = block
+            level = heading_level(text, size, body_size)
+            if level:
+                # Los títulos partidos en varias líneas se escriben en una
+                self.add_paragraph(" ".join(text.split("\n")), self.heading_styles[level - 1])
+            else:
+                self.add_paragraph(text)
+
+    def add_text(self, text: str) -> None:
+        """Texto sin estructura (OCR): un párrafo por cada bloque separado por líneas en blanco."""
+        for paragraph in re.split(r"\n\s*\n", text.strip()):
+            if paragraph.strip():
+                self.add_paragraph(paragraph.strip())
+
+    def add_page_break(self) -> None:
+        self._add('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+
+    def finish(self) -> None:
+        """Inserta lo pendiente; Word exige un párrafo tras una tabla al final del documento."""
+        if self._ends_with_table:
+            self._add("<w:p/>")
+        self.flush()
+
+    def flush(self) -> None:
+        """Analiza el XML acumulado y lo inserta en el documento."""
+        if not self._parts:
+            return
+        fragment = parse_xml(f"<w:body {nsdecls('w')}>{''.join(self._parts)}</w:body>")
+        self._parts = []
+        self._size = 0
+        sectPr = self.body.sectPr
+        for element in list(fragment):
+            if sectPr is not None:
+                sectPr.addprevious(element)
+            else:
+                self.body.append(element)
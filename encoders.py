@@ -0,0 +1,235 @@
+# encoders.py
+
+"""
+Formatos de salida para exportar páginas como imagen.
+
+Cada formato es un Encoder(extensión, función de guardado, bitonal). La
+función recibe la imagen PIL, la ruta y sus opciones propias:
+
+    jpg      quality=95, progressive=False, optimize=False, subsampling=None
+             (subsampling: "4:4:4", "4:2:2" o "4:2:0"; None = el de Pillow)
+    webp     quality=80, lossless=False, method=4 (0 rápido ... 6 más pequeño)
+    png      compress_level=6, optimize=False (sin pérdida)
+    tiff-g4  CCITT Group 4 (bitonal, sin pérdida); ver combine_tiff para
+             juntar las páginas en un TIFF multipágina
+    avif     quality=60, speed=6 (solo si Pillow se compiló con AVIF)
+
+color_mode reduce la imagen antes de codificarla:
+    "rgb"      sin cambios
+    "gray"     escala de grises
+    "bitonal"  blanco y negro (umbral 50 %)
+    "auto"     detecta si la página es gris o bitonal (detect_color_mode); las
+               páginas bitonales solo se umbralizan en los formatos que se
+               benefician (bitonal=True: png y tiff-g4); en JPEG, WebP y AVIF
+               los bordes duros ocupan más que el gris suavizado
+
+Uso:
+    python encoders.py referencia.pdf [--dpi 150] [--pages 5]
+imprime una tabla de tiempo y bytes por página para cada formato.
+"""
+
+import argparse
+import inspect
+import io
+import os
+import sys
+import time
+from collections import namedtuple
+
+from PIL import Image, ImageChops, TiffImagePlugin, features
+
+# Diferencia máxima entre canales para considerar gris una imagen RGB
+GRAY_TOLERANCE = 8
+# Fracción máxima de píxeles intermedios (ni casi negros ni casi blancos) para
+# considerar bitonal una imagen gris (el suavizado de bordes produce algunos)
+BITONAL_MAX_MIDTONES = 0.01
+
+Encoder = namedtuple("Encoder", "extension save bitonal")
+
+def _save_jpeg(img, path, quality=95, progressive=False, optimize=False, subsampling=None):
+    if img.mode == "1":
+        img = img.convert("L")
+    params = {"quality": quality, "progressive": progressive, "optimize": optimize}
+    if subsampling is not None:
+        params["subsampling"] = subsampling
+    img.save(path, "JPEG", **params)
+
+def _save_webp(img, path, quality=80, lossless=False, method=4):
+    # WebP no tiene modo gris: se guarda como RGB (los canales de color
+    # constantes apenas ocupan)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    img.save(path, "WEBP", quality=quality, lossless=lossless, method=method)
+
+def _save_png(img, path, compress_level=6, optimize=False):
+    img.save(path, "PNG", compress_level=compress_level, optimize=optimize)
+
+def _save_tiff_g4(img, path):
+    if img.mode != "1":
+        img = to_bitonal(img)
+    img.save(path, "TIFF", compression="group4")
+
+def _save_avif(img, path, quality=60, speed=6):
+    if img.mode == "1":
+        img = img.convert("L")
+    img.save(path, "AVIF", quality=quality, speed=speed)
+
+ENCODERS = {
+    "jpg": Encoder(".jpg", _save_jpeg, False),
+    "webp": Encoder(".webp", _save_webp, False),
+    "png": Encoder(".png", _save_png, True),
+    "tiff-g4": Encoder(".tif", _save_tiff_g4, True),
+    "avif": Encoder(".avif", _save_avif, False),
+}
+
+# Formatos que necesitan soporte compilado en Pillow
+_FEATURES = {"webp": "webp", "tiff-g4": "libtiff", "avif": "avif"}
+
+def available_formats() -> list:
+    """Formatos que se pueden usar con la instalación actual de Pillow."""
+    return [name for name in ENCODERS if name not in _FEATURES or features.check(_FEATURES[name])]
+
+def get_encoder(fmt: str) -> Encoder:
+    if fmt not in ENCODERS:
+        raise ValueError(f"Formato desconocido: {fmt}. Formatos: {', '.join(ENCODERS)}.")
+    if fmt not in available_formats():
+        raise ValueError(f"Esta instalación de Pillow no admite el formato {fmt}.")
+    return ENCODERS[fmt]
+
+def encoder_options(fmt: str, **options) -> dict:
+    """
+    Filtra las opciones que admite el formato (y las que no son None), para
+    pasar a encode() las opciones generales de la línea de comandos.
+    """
+    accepted = inspect.signature(get_encoder(fmt).save).parameters
+    return {name: value for name, value in options.items() if name in accepted and value is not None}
+
+def to_bitonal(img):
+    """Blanco y negro con umbral al 50 % (sin tramado, mejor para G4 y OCR)."""
+    return img.convert("L").point(lambda value: 255 if value >= 128 else 0, mode="1")
+
+def detect_color_mode(img) -> str:
+    """
+    "bitonal" si la imagen es en la práctica blanco y negro, "gray" si todos
+    sus píxeles son grises y "rgb" en otro caso.
+    """
+    if img.mode == "RGB":
+        r, g, b = img.split()
+        if any(ImageChops.difference(x, y).getextrema()[1] > GRAY_TOLERANCE for x, y in ((r, g), (g, b))):
+            return "rgb"
+        gray = g
+    else:
+        gray = img.convert("L")
+
+    histogram = gray.histogram()
+    midtones = sum(histogram[32:224])
+    if midtones <= BITONAL_MAX_MIDTONES * gray.width * gray.height:
+        return "bitonal"
+    return "gray"
+
+def apply_color_mode(img, color_mode: str = "rgb", allow_bitonal: bool = True):
+    """
+    Convierte la imagen según color_mode ("rgb", "gray", "bitonal" o "auto").
+    Con "auto" y allow_bitonal = False, las páginas bitonales quedan en gris.
+    """
+    if color_mode == "auto":
+        color_mode = detect_color_mode(img)
+        if color_mode == "bitonal" and not allow_bitonal:
+            color_mode = "gray"
+    if color_mode == "gray":
+        return img.convert("L")
+    if color_mode == "bitonal":
+        return to_bitonal(img)
+    return img
+
+def encode(img, path_base: str, fmt: str = "jpg", color_mode: str = "rgb", **options) -> str:
+    """
+    Guarda la imagen en `path_base` + extensión del formato y devuelve la ruta.
+    options son las opciones propias del formato (ver la cabecera del módulo).
+    """
+    encoder = get_encoder(fmt)
+    path = path_base + encoder.extension
+    encoder.save(apply_color_mode(img, color_mode, encoder.bitonal), path, **options)
+    return path
+
+def combine_tiff(page_paths: list, output_path: str, remove_pages: bool = False) -> None:
+    """
+    Junta TIFF de una página (en el orden dado) en un único TIFF multipágina
+    con compresión G4, abriendo una página cada vez.
+    """
+    with open(output_path, "w+b") as fp, TiffImagePlugin.AppendingTiffWriter(fp) as tiff:
+        for page_path in page_paths:
+            with Image.open(page_path) as img:
+                if img.mode != "1":
+                    img = to_bitonal(img)
+                img.save(tiff, format="TIFF", compression="group4", dpi=img.info.get("dpi", (72, 72)))
+            tiff.newFrame()
+    if remove_pages:
+        for page_path in page_paths:
+            os.remove(page_path)
+
+# Configuraciones que compara la tabla de referencia
+BENCHMARK_CONFIGS = [
+    ("jpg", "rgb", {"quality": 95}),
+    ("jpg", "rgb", {"quality": 85, "optimize": True, "progressive": True, "subsampling": "4:2:0"}),
+    ("jpg", "auto", {"quality": 85, "optimize": True, "progressive": True}),
+    ("webp", "rgb", {"quality": 80}),
+    ("webp", "rgb", {"lossless": True, "method": 4}),
+    ("png", "rgb", {"compress_level": 6}),
+    ("png", "auto", {"compress_level": 6}),
+    ("tiff-g4", "bitonal", {}),
+    ("avif", "rgb", {"quality": 60, "speed": 6}),
+]
+
+def benchmark(pdf_path: str, dpi: int = 150, max_pages: int = None, repeat: int = 3) -> list:
+    """
+    Codifica las páginas de pdf_path con cada configuración de
+    BENCHMARK_CONFIGS y devuelve [(formato, color, opciones, ms/página,
+    bytes/página)]. Cada página se renderiza una sola vez y se codifica en
+    memoria (sin contar la escritura en disco); de `repeat` repeticiones se
+    toma la más rápida.
+    """
+    import fitz  # PyMuPDF
+
+    with fitz.open(pdf_path) as pdf_document:
+        pages = range(len(pdf_document) if max_pages is None else min(max_pages, len(pdf_document)))
+        images = []
+        for page_number in pages:
+            pix = pdf_document.load_page(page_number).get_pixmap(dpi=dpi)
+            images.append(Image.frombytes("RGB", (pix.width, pix.height), pix.samples))
+
+    results = []
+    formats = available_formats()
+    for fmt, color_mode, options in BENCHMARK_CONFIGS:
+        if fmt not in formats:
+            continue
+        encoder = ENCODERS[fmt]
+        best = None
+        for _ in range(repeat):
+            size = 0
+            start = time.perf_counter()
+            for img in images:
+                output = io.BytesIO()
+                encoder.save(apply_color_mode(img, color_mode, encoder.bitonal), output, **options)
+                size += output.tell()
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        results.append((fmt, color_mode, options, best * 1000 / len(images), size / len(images)))
+    return results
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tiempo y tamaño por página de cada formato de salida.")
+    parser.add_argument("pdf", help="PDF de referencia.")
+    parser.add_argument("--dpi", type=int, default=150, help="Resolución de renderizado (por defecto 150).")
+    parser.add_argument("--pages", type=int, default=None, help="Páginas a usar (por defecto todas).")
+    args = parser.parse_args(argv)
+
+    print(f"| {'formato':<8} | {'color':<7} | {'opciones':<62} | {'ms/página':>9} | {'KB/página':>9} |")
+    print(f"|{'-' * 10}|{'-' * 9}|{'-' * 64}|{'-' * 10}:|{'-' * 10}:|")
+    for fmt, color_mode, options, ms, size in benchmark(args.pdf, args.dpi, args.pages):
+        options_text = ", ".join(f"{k}={v}" for k, v in options.items())
+        print(f"| {fmt:<8} | {color_mode:<7} | {options_text:<62} | {ms:>9.1f} | {size / 1024:>9.1f} |")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,9 @@
 # extract_pages.py
 
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import fitz  # PyMuPDF
-from tkinter import messagebox
+import dialogs
 
 def extract_pages_from_pdf(input_pdf: str, output_pdf: str, start_page: int, end_page: int) -> None:
     """
@@ -11,7 +12,7 @@ def extract_pages_from_pdf(input_pdf: str, output_pdf: str, start_page: int, end
     try:
         pdf_document = fitz.open(input_pdf)
     except Exception as e:
-        messagebox.showerror("Error", f"No se pudo abrir el PDF de entrada.\n{e}")
+        dialogs.showerror("Error", f"No se pudo abrir el PDF de entrada.\n{e}")
         return
 
     if (
@@ -19,29 +20,181 @@ def extract_pages_from_pdf(input_pdf: str, output_pdf: str, start_page: int, end
         end_page > len(pdf_document) or
         start_page > end_page
     ):
-        messagebox.showwarning("Aviso", "Rango de páginas inválido.")
+        dialogs.showwarning("Aviso", "Rango de páginas inválido.")
         pdf_document.close()
         return
 
     output_document = fitz.open()
 
     try:
-        for page_num in range(start_page - 1, end_page):
-            output_document.insert_pdf(pdf_document, from_page=page_num, to_page=page_num)
+        # Una sola llamada para todo el rango (los recursos compartidos entre
+        # páginas se copian una vez)
+        output_document.insert_pdf(pdf_document, from_page=start_page - 1, to_page=end_page - 1)
     except Exception as e:
-        messagebox.showerror("Error", f"No se pudieron extraer las páginas.\n{e}")
+        dialogs.showerror("Error", f"No se pudieron extraer las páginas.\n{e}")
         output_document.close()
         pdf_document.close()
         return
 
     try:
         output_document.save(output_pdf)
-        messagebox.showinfo(
+        dialogs.showinfo(
             "Proceso completado",
             f"Páginas {start_page}-{end_page} extraídas y guardadas en:\n{output_pdf}"
         )
     except Exception as e:
-        messagebox.showerror("Error", f"No se pudo guardar el PDF de salida.\n{e}")
+        dialogs.showerror("Error", f"No se pudo guardar el PDF de salida.\n{e}")
     finally:
         output_document.close()
         pdf_document.close()
+
+
+def parse_ranges(text: str) -> list:
+    """
+    Convierte un texto como "1-5, 8, 10-12" en [(1, 5), (8, 8), (10, 12)]
+    (páginas en base 1, ambos extremos incluidos). Lanza ValueError si el
+    texto no es válido.
+    """
+    ranges = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        start = int(start)
+        end = int(end) if end.strip() else start
+        ranges.append((start, end))
+    if not ranges:
+        raise ValueError("No se indicó ningún rango de páginas.")
+    return ranges
+
+def ranges_every(total_pages: int, every: int) -> list:
+    """Rangos consecutivos de `every` páginas (el último puede ser más corto)."""
+    return [(start, min(start + every - 1, total_pages)) for start in range(1, total_pages + 1, every)]
+
+def ranges_from_bookmarks(pdf_document, level: int = 1) -> list:
+    """
+    Un rango por cada marcador del nivel indicado: desde su página hasta la
+    anterior al siguiente marcador. Las páginas previas al primer marcador se
+    incluyen en el primer rango.
+    """
+    total_pages = len(pdf_document)
+    starts = sorted({
+        page for lvl, _, page in pdf_document.get_toc(simple=True)
+        if lvl == level and 1 <= page <= total_pages
+    })
+    if not starts:
+        return []
+    starts[0] = 1
+    ends = [start - 1 for start in starts[1:]] + [total_pages]
+    return list(zip(starts, ends))
+
+def _split_output_path(output_folder: str, pdf_name: str, start: int, end: int) -> str:
+    return os.path.join(output_folder, f"{pdf_name}_p{start}-{end}.pdf")
+
+def _write_ranges(pdf_document, output_folder: str, pdf_name: str, ranges: list) -> list:
+    """
+    Escribe un PDF por rango a partir del documento ya abierto.
+    Devuelve [(rango, ruta de salida o None, mensaje de error o None)].
+    """
+    results = []
+    for start, end in ranges:
+        output_pdf = _split_output_path(output_folder, pdf_name, start, end)
+        try:
+            with fitz.open() as output_document:
+                output_document.insert_pdf(pdf_document, from_page=start - 1, to_page=end - 1)
+                output_document.save(output_pdf)
+            results.append(((start, end), output_pdf, None))
+        except Exception as e:
+            results.append(((start, end), None, str(e)))
+    return results
+
+def _write_ranges_block(input_pdf: str, output_folder: str, ranges: list) -> list:
+    """
+    Igual que _write_ranges, dentro de un proceso del pool: cada proceso abre
+    el PDF de entrada una sola vez para todos sus rangos.
+    """
+    pdf_name = os.path.splitext(os.path.basename(input_pdf))[0]
+    with fitz.open(input_pdf) as pdf_document:
+        return _write_ranges(pdf_document, output_folder, pdf_name, ranges)
+
+def split_pdf(input_pdf: str, output_folder: str, ranges: list = None, every: int = None,
+              bookmarks: bool = False, workers: int = 1, progress=None, cancel_event=None) -> list:
+    """
+    Divide un PDF en varios documentos en una sola pasada. Los rangos se
+    indican de una de estas formas:
+    - ranges: lista de (inicio, fin) en base 1, ambos incluidos.
+    - every: un documento cada `every` páginas.
+    - bookmarks = True: un documento por marcador de primer nivel.
+    El PDF de entrada se abre una vez (una vez por proceso si workers > 1) y
+    cada rango se copia con una sola llamada a insert_pdf. Los archivos se
+    llaman {nombre}_p{inicio}-{fin}.pdf.
+    - progress(hechos, total) se llama a medida que se escriben documentos.
+    - Si cancel_event (threading.Event) se activa, no se escriben más rangos.
+    Devuelve la lista de archivos generados.
+    """
+    try:
+        pdf_document = fitz.open(input_pdf)
+    except Exception as e:
+        dialogs.showerror("Error", f"No se pudo abrir el PDF de entrada.\n{e}")
+        return []
+
+    total_pages = len(pdf_document)
+    pdf_name = os.path.splitext(os.path.basename(input_pdf))[0]
+
+    if every:
+        ranges = ranges_every(total_pages, every)
+    elif bookmarks:
+        ranges = ranges_from_bookmarks(pdf_document)
+        if not ranges:
+            dialogs.showwarning("Aviso", "El PDF no tiene marcadores por los que dividir.")
+            pdf_document.close()
+            return []
+
+    if not ranges or any(start < 1 or end > total_pages or start > end for start, end in ranges):
+        dialogs.showwarning("Aviso", "Rango de páginas inválido.")
+        pdf_document.close()
+        return []
+
+    results = {}
+
+    def collect(block_results):
+        for (start, end), output_pdf, error in block_results:
+            if error is not None:
+                dialogs.showerror("Error", f"No se pudieron extraer las páginas {start}-{end}.\n{error}")
+            results[(start, end)] = output_pdf
+        if progress is not None:
+            progress(len(results), len(ranges))
+
+    if workers > 1 and len(ranges) > 1:
+        pdf_document.close()
+        # Varios bloques de rangos por proceso para repartir mejor la carga
+        n_blocks = min(len(ranges), workers * 4)
+        blocks = [ranges[i::n_blocks] for i in range(n_blocks)]
+        with ProcessPoolExecutor(max_workers=min(workers, n_blocks)) as executor:
+            futures = [executor.submit(_write_ranges_block, input_pdf, output_folder, block) for block in blocks]
+            for future in as_completed(futures):
+                if cancel_event is not None and cancel_event.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+                try:
+                    collect(future.result())
+                except Exception as e:
+                    dialogs.showerror("Error", f"Falló un proceso de división.\n{e}")
+    else:
+        for page_range in ranges:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            collect(_write_ranges(pdf_document, output_folder, pdf_name, [page_range]))
+        pdf_document.close()
+
+    output_pdfs = [results[page_range] for page_range in ranges if results.get(page_range)]
+    if cancel_event is not None and cancel_event.is_set():
+        dialogs.showwarning("Cancelado", f"División cancelada.\nDocumentos generados: {len(output_pdfs)} de {len(ranges)}.")
+    else:
+        dialogs.showinfo(
+            "Proceso completado",
+            f"{len(output_pdfs)} documentos PDF guardados en:\n{output_folder}"
+        )
+    return output_pdfs
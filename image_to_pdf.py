@@ -1,42 +1,156 @@
 # image_to_pdf.py
 
+import io
 import os
 from PIL import Image
-from tkinter import messagebox
+import fitz  # PyMuPDF
+import dialogs
+from tracing import NULL_TRACER
 
-def images_to_pdf(input_path: str, output_path: str) -> None:
+VALID_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.gif']
+
+# En modo streaming, cada cuántas páginas se vuelca el PDF a disco
+STREAMING_FLUSH_EVERY = 10
+
+def _collect_image_paths(input_path: str) -> list:
+    """
+    Devuelve las rutas de las imágenes válidas de una carpeta (ordenadas)
+    o la propia ruta si es una sola imagen.
+    """
+    if os.path.isdir(input_path):
+        return [
+            os.path.join(input_path, file)
+            for file in sorted(os.listdir(input_path))
+            if os.path.splitext(file)[1].lower() in VALID_EXTENSIONS
+        ]
+    if os.path.splitext(input_path)[1].lower() in VALID_EXTENSIONS:
+        return [input_path]
+    return []
+
+def _image_page_data(img_path: str, passthrough: bool) -> tuple:
+    """
+    Devuelve (bytes, ancho, alto) listos para insertar como página.
+    - Con passthrough, los JPEG (y los PNG sin transparencia) se insertan tal
+      cual: PyMuPDF guarda el JPEG como flujo DCT sin decodificarlo ni
+      recomprimirlo. Pillow solo lee la cabecera para obtener el tamaño.
+    - El resto (PNG con alfa, GIF, BMP...) se convierte a RGB y se comprime
+      en JPEG, igual que el escritor PDF de Pillow.
+    La página es de 72 ppp (1 píxel = 1 punto), como en el camino de Pillow.
+    """
+    with Image.open(img_path) as img:
+        size = img.size
+        embeddable = passthrough and (
+            (img.format == "JPEG" and img.mode in ("L", "RGB", "CMYK")) or
+            (img.format == "PNG" and img.mode in ("L", "RGB"))
+        )
+        if not embeddable:
+            rgb = img.convert('RGB')
+
+    if embeddable:
+        with open(img_path, "rb") as f:
+            return f.read(), size[0], size[1]
+
+    buffer = io.BytesIO()
+    rgb.save(buffer, "JPEG")
+    return buffer.getvalue(), size[0], size[1]
+
+def _write_pdf_pymupdf(image_paths: list, output_path: str, passthrough: bool, flush_every: int = None,
+                       tracer=NULL_TRACER) -> int:
+    """
+    Escribe las imágenes en el PDF de una en una con PyMuPDF.
+    Si flush_every está definido, cada flush_every páginas se guarda de forma
+    incremental y se reabre el documento, de modo que la memoria no crece con
+    el número de imágenes. Devuelve el número de páginas escritas.
+    """
+    pdf_document = fitz.open()
+    saved = False
+    pages = 0
+
+    for img_path in image_paths:
+        try:
+            with tracer.stage("read_image", pages) as stage:
+                data, width, height = _image_page_data(img_path, passthrough)
+                stage.bytes = len(data)
+        except Exception as e:
+            dialogs.showerror("Error", f"No se pudo abrir la imagen {os.path.basename(img_path)}.\n{e}")
+            continue
+
+        with tracer.stage("insert_image", pages) as stage:
+            page = pdf_document.new_page(width=width, height=height)
+            page.insert_image(page.rect, stream=data)
+            stage.bytes = len(data)
+        del data
+        pages += 1
+
+        if flush_every and pages % flush_every == 0:
+            with tracer.stage("save"):
+                if saved:
+                    pdf_document.saveIncr()
+                else:
+                    pdf_document.save(output_path)
+                    saved = True
+                pdf_document.close()
+                pdf_document = fitz.open(output_path)
+
+    if pages and not (flush_every and pages % flush_every == 0):
+        with tracer.stage("save"):
+            if saved:
+                pdf_document.saveIncr()
+            else:
+                pdf_document.save(output_path)
+    pdf_document.close()
+    return pages
+
+def images_to_pdf(input_path: str, output_path: str, streaming: bool = False, passthrough: bool = True,
+                  tracer=None) -> None:
     """
     Convierte una carpeta con imágenes (o una sola imagen)
     en un único archivo PDF.
+    - Si passthrough = True, los JPEG se incrustan sin decodificar ni recomprimir.
+    - Si streaming = True, las páginas se escriben de una en una y la memoria
+      queda acotada a una o dos imágenes, sea cual sea el tamaño de la carpeta.
+    - Con ambas opciones desactivadas se usa el escritor PDF de Pillow.
+    - tracer (tracing.Tracer): registra el tiempo de lectura e inserción de
+      cada imagen (page = posición de la imagen) y de los guardados.
     """
-    valid_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.gif']
-    images = []
+    if tracer is None:
+        tracer = NULL_TRACER
+    image_paths = _collect_image_paths(input_path)
 
-    if os.path.isdir(input_path):
-        # Obtener todas las imágenes de la carpeta
-        for file in sorted(os.listdir(input_path)):
-            if os.path.splitext(file)[1].lower() in valid_extensions:
-                img_path = os.path.join(input_path, file)
-                try:
-                    img = Image.open(img_path).convert('RGB')
-                    images.append(img)
-                except Exception as e:
-                    messagebox.showerror("Error", f"No se pudo abrir la imagen {file}.\n{e}")
-    else:
-        # Procesar una sola imagen
-        if os.path.splitext(input_path)[1].lower() in valid_extensions:
-            try:
-                img = Image.open(input_path).convert('RGB')
-                images.append(img)
-            except Exception as e:
-                messagebox.showerror("Error", f"No se pudo abrir la imagen.\n{e}")
+    if streaming or passthrough:
+        flush_every = STREAMING_FLUSH_EVERY if streaming else None
+        try:
+            pages = _write_pdf_pymupdf(image_paths, output_path, passthrough, flush_every, tracer) if image_paths else 0
+        except Exception as e:
+            dialogs.showerror("Error", f"No se pudo guardar el PDF.\n{e}")
+            return
+        if not pages:
+            dialogs.showwarning("Aviso", "No se encontraron imágenes válidas para convertir.")
+            return
+        dialogs.showinfo("Proceso completado", f"PDF guardado en:\n{output_path}")
+        return
+
+    images = []
+    for img_path in image_paths:
+        try:
+            with tracer.stage("read_image", len(images)):
+                img = Image.open(img_path).convert('RGB')
+            images.append(img)
+        except Exception as e:
+            if os.path.isdir(input_path):
+                dialogs.showerror("Error", f"No se pudo abrir la imagen {os.path.basename(img_path)}.\n{e}")
+            else:
+                dialogs.showerror("Error", f"No se pudo abrir la imagen.\n{e}")
 
     if not images:
-        messagebox.showwarning("Aviso", "No se encontraron imágenes válidas para convertir.")
+        dialogs.showwarning("Aviso", "No se encontraron imágenes válidas para convertir.")
         return
 
     try:
-        images[0].save(output_path, save_all=True, append_images=images[1:])
-        messagebox.showinfo("Proceso completado", f"PDF guardado en:\n{output_path}")
+        with tracer.stage("save") as stage:
+            images[0].save(output_path, save_all=True, append_images=images[1:])
+            if tracer.enabled:
+                stage.bytes = os.path.getsize(output_path)
+        dialogs.showinfo("Proceso completado", f"PDF guardado en:\n{output_path}")
     except Exception as e:
-        messagebox.showerror("Error", f"No se pudo guardar el PDF.\n{e}")
+        dialogs.showerror("Error", f"No se pudo guardar el PDF.\n{e}")
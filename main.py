@@ -2,12 +2,18 @@
 
 import os
 import sys
+import multiprocessing
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from image_to_pdf import images_to_pdf
-from pdf_to_word import pdf_to_word
-from pdf_to_jpg import pdf_to_jpg
-from extract_pages import extract_pages_from_pdf
+import dialogs
+
+# Los conversores (PyMuPDF, python-docx, Pillow, pytesseract...) se importan al
+# ejecutar la opción elegida, no al arrancar: así la ventana aparece antes. La
+# importación se hace en el hilo de trabajo, para no congelar la ventana.
+# startup_report.py mide el tiempo de arranque y vigila que siga siendo así.
 
 class AppUnificada(tk.Tk):
     """
@@ -16,12 +22,13 @@ class AppUnificada(tk.Tk):
     2) Convertir PDF a Word
     3) Convertir PDF a JPG
     4) Extraer páginas de PDF
+    5) Hacer buscable un PDF escaneado (capa de texto OCR)
     """
 
     def __init__(self):
         super().__init__()
         self.title("App Unificada PDF / Imágenes")
-        self.geometry("550x500")  # Aumentar altura para acomodar más widgets
+        self.geometry("550x600")  # Aumentar altura para acomodar más widgets
         self.resizable(False, False)
 
         # Variables de control
@@ -29,9 +36,22 @@ class AppUnificada(tk.Tk):
         self.file_path_var = tk.StringVar()
         self.output_path_var = tk.StringVar()
         self.ocr_var = tk.BooleanVar(value=False)
+        self.streaming_var = tk.BooleanVar(value=False)  # Solo para Imágenes->PDF
         self.dpi_var = tk.StringVar(value="300")  # Solo para PDF->JPG
+        self.workers_var = tk.StringVar(value="1")  # Procesos para PDF->JPG
+        self.format_var = tk.StringVar(value="jpg")  # Formato para PDF->JPG
+        self.color_var = tk.StringVar(value="rgb")  # Color para PDF->JPG
+        self.resume_var = tk.BooleanVar(value=False)  # PDF->Word y PDF->JPG
+        self.layout_var = tk.BooleanVar(value=False)  # Solo para PDF->Word
         self.start_page_var = tk.StringVar()
         self.end_page_var = tk.StringVar()
+        self.status_var = tk.StringVar()
+
+        # Estado de la conversión en segundo plano
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.worker = None
+        self.started_at = None
 
         # Crear interfaz
         self.create_widgets()
@@ -66,6 +86,12 @@ class AppUnificada(tk.Tk):
             command=self.update_ui
         ).pack(anchor="w", padx=5, pady=2)
 
+        tk.Radiobutton(
+            options_frame, text="PDF buscable (OCR)",
+            variable=self.option_var, value="pdf_to_searchable",
+            command=self.update_ui
+        ).pack(anchor="w", padx=5, pady=2)
+
         # Frame para seleccionar archivo(s) de entrada
         input_frame = tk.LabelFrame(self, text="Entrada")
         input_frame.pack(fill="x", padx=10, pady=5)
@@ -85,9 +111,37 @@ class AppUnificada(tk.Tk):
         )
         self.ocr_check.grid(row=0, column=0, padx=5, pady=5, sticky="w")
 
+        # 1a) Conservar títulos, párrafos y tablas (para PDF a Word)
+        self.layout_check = tk.Checkbutton(
+            self.options_specific_frame, text="Conservar estructura (títulos, párrafos, tablas)",
+            variable=self.layout_var
+        )
+
+        # 1b) Modo streaming (para Imágenes->PDF)
+        self.streaming_check = tk.Checkbutton(
+            self.options_specific_frame, text="Modo streaming (carpetas muy grandes)",
+            variable=self.streaming_var
+        )
+
+        # 1c) Reanudar conversiones interrumpidas (PDF->Word y PDF->JPG)
+        self.resume_check = tk.Checkbutton(
+            self.options_specific_frame, text="Reanudar conversión interrumpida",
+            variable=self.resume_var
+        )
+
         # 2) DPI (para PDF->JPG)
         self.dpi_label = tk.Label(self.options_specific_frame, text="DPI (para PDF->JPG):")
         self.dpi_entry = tk.Entry(self.options_specific_frame, textvariable=self.dpi_var, width=6)
+        self.workers_label = tk.Label(self.options_specific_frame, text="Procesos:")
+        self.workers_entry = tk.Entry(self.options_specific_frame, textvariable=self.workers_var, width=4)
+        # Los formatos se validan al convertir (encoders importa Pillow, que no
+        # se carga al arrancar)
+        self.format_label = tk.Label(self.options_specific_frame, text="Formato:")
+        self.format_menu = tk.OptionMenu(self.options_specific_frame, self.format_var,
+                                         "jpg", "webp", "png", "tiff-g4", "avif")
+        self.color_label = tk.Label(self.options_specific_frame, text="Color:")
+        self.color_menu = tk.OptionMenu(self.options_specific_frame, self.color_var,
+                                        "rgb", "auto", "gray", "bitonal")
 
         # 3) Rango de páginas (para Extraer páginas)
         self.start_page_label = tk.Label(self.options_specific_frame, text="Página inicial:")
@@ -104,8 +158,24 @@ class AppUnificada(tk.Tk):
         tk.Entry(output_frame, textvariable=self.output_path_var, width=40).grid(row=0, column=1, padx=5, pady=5)
         tk.Button(output_frame, text="Guardar en...", command=self.browse_output).grid(row=0, column=2, padx=5, pady=5)
 
-        # Botón ejecutar
-        tk.Button(self, text="Ejecutar", command=self.execute_action, bg="green", fg="white", font=("Arial", 12)).pack(pady=20)
+        # Botones ejecutar / cancelar
+        buttons_frame = tk.Frame(self)
+        buttons_frame.pack(pady=10)
+        self.execute_button = tk.Button(
+            buttons_frame, text="Ejecutar", command=self.execute_action,
+            bg="green", fg="white", font=("Arial", 12)
+        )
+        self.execute_button.pack(side="left", padx=5)
+        self.cancel_button = tk.Button(
+            buttons_frame, text="Cancelar", command=self.cancel_action,
+            font=("Arial", 12), state="disabled"
+        )
+        self.cancel_button.pack(side="left", padx=5)
+
+        # Progreso (barra + páginas, velocidad y tiempo restante)
+        self.progress_bar = ttk.Progressbar(self, orient="horizontal", length=500, mode="determinate")
+        self.progress_bar.pack(padx=10, pady=5)
+        tk.Label(self, textvariable=self.status_var).pack(padx=10)
 
         # Añadir el Label de Versión 1.1 en la parte inferior derecha
         version_label = tk.Label(self, text="Versión 1.1", font=("Arial", 8))
@@ -154,7 +224,7 @@ class AppUnificada(tk.Tk):
             )
             if file:
                 self.output_path_var.set(file)
-        elif option in ["pdf_to_word", "pdf_to_jpg"]:
+        elif option in ["pdf_to_word", "pdf_to_jpg", "pdf_to_searchable"]:
             # Seleccionar carpeta de salida
             folder = filedialog.askdirectory(title="Selecciona carpeta de salida")
             if folder:
@@ -166,18 +236,38 @@ class AppUnificada(tk.Tk):
 
         # Ocultar todos los widgets específicos
         self.ocr_check.grid_remove()
+        self.layout_check.grid_remove()
+        self.streaming_check.grid_remove()
+        self.resume_check.grid_remove()
         self.dpi_label.grid_remove()
         self.dpi_entry.grid_remove()
+        self.workers_label.grid_remove()
+        self.workers_entry.grid_remove()
+        self.format_label.grid_remove()
+        self.format_menu.grid_remove()
+        self.color_label.grid_remove()
+        self.color_menu.grid_remove()
         self.start_page_label.grid_remove()
         self.start_page_entry.grid_remove()
         self.end_page_label.grid_remove()
         self.end_page_entry.grid_remove()
 
-        if option == "pdf_to_word":
+        if option == "img_to_pdf":
+            self.streaming_check.grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        elif option == "pdf_to_word":
             self.ocr_check.grid(row=0, column=0, padx=5, pady=5, sticky="w")
+            self.layout_check.grid(row=1, column=0, columnspan=4, padx=5, pady=5, sticky="w")
+            self.resume_check.grid(row=4, column=0, columnspan=4, padx=5, pady=5, sticky="w")
         elif option == "pdf_to_jpg":
             self.dpi_label.grid(row=1, column=0, padx=5, pady=5, sticky="e")
             self.dpi_entry.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+            self.workers_label.grid(row=1, column=2, padx=5, pady=5, sticky="e")
+            self.workers_entry.grid(row=1, column=3, padx=5, pady=5, sticky="w")
+            self.format_label.grid(row=2, column=0, padx=5, pady=5, sticky="e")
+            self.format_menu.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+            self.color_label.grid(row=2, column=2, padx=5, pady=5, sticky="e")
+            self.color_menu.grid(row=2, column=3, padx=5, pady=5, sticky="w")
+            self.resume_check.grid(row=4, column=0, columnspan=4, padx=5, pady=5, sticky="w")
         elif option == "extract_pages":
             self.start_page_label.grid(row=2, column=0, padx=5, pady=5, sticky="e")
             self.start_page_entry.grid(row=2, column=1, padx=5, pady=5, sticky="w")
@@ -185,7 +275,7 @@ class AppUnificada(tk.Tk):
             self.end_page_entry.grid(row=3, column=1, padx=5, pady=5, sticky="w")
 
     def execute_action(self):
-        """Ejecuta la funcionalidad seleccionada."""
+        """Valida las entradas y lanza la funcionalidad seleccionada en segundo plano."""
         option = self.option_var.get()
         input_path = self.file_path_var.get().strip()
         output_path = self.output_path_var.get().strip()
@@ -198,48 +288,168 @@ class AppUnificada(tk.Tk):
             if not output_path:
                 messagebox.showwarning("Aviso", "Por favor, selecciona la ruta de salida.")
                 return
-        elif option in ["pdf_to_word", "pdf_to_jpg"]:
+        elif option in ["pdf_to_word", "pdf_to_jpg", "pdf_to_searchable"]:
             if not output_path or not os.path.isdir(output_path):
                 messagebox.showwarning("Aviso", "Por favor, selecciona una carpeta de salida válida.")
                 return
 
-        try:
-            if option == "img_to_pdf":
-                images_to_pdf(input_path, output_path)
-
-            elif option == "pdf_to_word":
-                use_ocr = self.ocr_var.get()
-                pdf_to_word(input_path, output_path, use_ocr)
-
-            elif option == "pdf_to_jpg":
-                try:
-                    dpi_value = int(self.dpi_var.get())
-                    if dpi_value <= 0:
-                        raise ValueError
-                except ValueError:
-                    messagebox.showwarning("Aviso", "Por favor, introduce un DPI válido (número entero positivo).")
-                    return
-                pdf_to_jpg(input_path, output_path, dpi=dpi_value)
-
-            elif option == "extract_pages":
-                # Validar las entradas de páginas
-                start_page_str = self.start_page_var.get().strip()
-                end_page_str = self.end_page_var.get().strip()
-
-                if not (start_page_str.isdigit() and end_page_str.isdigit()):
-                    messagebox.showwarning(
-                        "Aviso",
-                        "Por favor, introduce números válidos en 'Página inicial' y 'Página final'."
-                    )
-                    return
-
-                start_page = int(start_page_str)
-                end_page = int(end_page_str)
+        if option == "img_to_pdf":
+            streaming = self.streaming_var.get()
 
+            def task(progress, cancel_event):
+                from image_to_pdf import images_to_pdf
+                images_to_pdf(input_path, output_path, streaming=streaming)
+
+        elif option == "pdf_to_word":
+            use_ocr = self.ocr_var.get()
+            resume = self.resume_var.get()
+            layout = self.layout_var.get()
+
+            def task(progress, cancel_event):
+                from pdf_to_word import pdf_to_word
+                pdf_to_word(
+                    input_path, output_path, use_ocr, progress=progress, cancel_event=cancel_event,
+                    resume=resume, layout=layout
+                )
+
+        elif option == "pdf_to_searchable":
+            def task(progress, cancel_event):
+                from searchable_pdf import pdf_to_searchable_pdf
+                pdf_to_searchable_pdf(input_path, output_path, progress=progress, cancel_event=cancel_event)
+
+        elif option == "pdf_to_jpg":
+            try:
+                dpi_value = int(self.dpi_var.get())
+                if dpi_value <= 0:
+                    raise ValueError
+            except ValueError:
+                messagebox.showwarning("Aviso", "Por favor, introduce un DPI válido (número entero positivo).")
+                return
+            try:
+                workers_value = int(self.workers_var.get())
+                if workers_value <= 0:
+                    raise ValueError
+            except ValueError:
+                messagebox.showwarning("Aviso", "Por favor, introduce un número de procesos válido (entero positivo).")
+                return
+            resume = self.resume_var.get()
+            fmt = self.format_var.get()
+            color_mode = self.color_var.get()
+
+            def task(progress, cancel_event):
+                from pdf_to_jpg import pdf_to_jpg
+                pdf_to_jpg(
+                    input_path, output_path, dpi=dpi_value, workers=workers_value,
+                    progress=progress, cancel_event=cancel_event, resume=resume,
+                    fmt=fmt, color_mode=color_mode
+                )
+
+        elif option == "extract_pages":
+            # Validar las entradas de páginas
+            start_page_str = self.start_page_var.get().strip()
+            end_page_str = self.end_page_var.get().strip()
+
+            if not (start_page_str.isdigit() and end_page_str.isdigit()):
+                messagebox.showwarning(
+                    "Aviso",
+                    "Por favor, introduce números válidos en 'Página inicial' y 'Página final'."
+                )
+                return
+
+            start_page = int(start_page_str)
+            end_page = int(end_page_str)
+
+            def task(progress, cancel_event):
+                from extract_pages import extract_pages_from_pdf
                 extract_pages_from_pdf(input_path, output_path, start_page, end_page)
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Ocurrió un error inesperado:\n{e}")
+        else:
+            return
+
+        # Solo estas conversiones atienden cancel_event
+        self.start_task(task, cancellable=option in ["pdf_to_word", "pdf_to_jpg", "pdf_to_searchable"])
+
+    def start_task(self, task, cancellable: bool = False):
+        """
+        Ejecuta la conversión en un hilo de trabajo para no bloquear la ventana.
+        El hilo no toca Tk: envía eventos (progreso, avisos, fin) a una cola que
+        poll_events() atiende desde el hilo principal con after(). El botón
+        Cancelar solo se activa si la tarea atiende cancel_event (cancellable).
+        """
+        self.cancel_event.clear()
+        self.started_at = time.perf_counter()
+        self.progress_bar.config(mode="indeterminate", value=0)
+        self.progress_bar.start(10)
+        self.status_var.set("Procesando...")
+        self.execute_button.config(state="disabled")
+        self.cancel_button.config(state="normal" if cancellable else "disabled")
+
+        def progress(done, total):
+            self.events.put(("progress", done, total))
+
+        def run():
+            # Los avisos de las funciones se muestran desde el hilo principal
+            previous = dialogs.set_handler(lambda *message: self.events.put(("message",) + message))
+            try:
+                task(progress, self.cancel_event)
+            except Exception as e:
+                self.events.put(("message", "error", "Error", f"Ocurrió un error inesperado:\n{e}"))
+            finally:
+                dialogs.set_handler(previous)
+                self.events.put(("finished",))
+
+        self.worker = threading.Thread(target=run, daemon=True)
+        self.worker.start()
+        self.after(100, self.poll_events)
+
+    def poll_events(self):
+        """Procesa los eventos del hilo de trabajo (se reprograma mientras dure)."""
+        finished = False
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+
+            if event[0] == "progress":
+                self.update_progress(*event[1:])
+            elif event[0] == "message":
+                level, title, message = event[1:]
+                getattr(messagebox, f"show{level}")(title, message)
+            elif event[0] == "finished":
+                finished = True
+
+        if finished:
+            self.progress_bar.stop()
+            if self.cancel_event.is_set():
+                self.status_var.set("Cancelado")
+            self.execute_button.config(state="normal")
+            self.cancel_button.config(state="disabled")
+            self.worker = None
+        else:
+            self.after(100, self.poll_events)
+
+    def update_progress(self, done, total):
+        """Actualiza la barra y la estimación de tiempo restante (páginas/segundo medidas)."""
+        if str(self.progress_bar.cget("mode")) != "determinate":
+            self.progress_bar.stop()
+            self.progress_bar.config(mode="determinate")
+        self.progress_bar.config(maximum=max(total, 1), value=done)
+
+        elapsed = time.perf_counter() - self.started_at
+        rate = done / elapsed if elapsed > 0 else 0
+        status = f"Página {done} de {total}"
+        if rate > 0:
+            remaining = int((total - done) / rate)
+            status += f"  ·  {rate:.1f} pág/s  ·  quedan {remaining // 60:02d}:{remaining % 60:02d}"
+        self.status_var.set(status)
+
+    def cancel_action(self):
+        """Pide al hilo de trabajo que se detenga en el siguiente límite de página."""
+        if self.worker is not None:
+            self.cancel_event.set()
+            self.cancel_button.config(state="disabled")
+            self.status_var.set("Cancelando...")
 
 def resource_path(relative_path):
     """Obtiene la ruta absoluta del recurso, funciona para scripts y para PyInstaller."""
@@ -252,5 +462,7 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 if __name__ == "__main__":
+    # Necesario para el pool de procesos en el ejecutable de PyInstaller (Windows)
+    multiprocessing.freeze_support()
     app = AppUnificada()
     app.mainloop()
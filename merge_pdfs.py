@@ -1,9 +1,11 @@
 # merge_pdf,py
 
 import fitz  # PyMuPDF
-from tkinter import Tk, filedialog, Toplevel, Button, Listbox, EXTENDED
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 def merge_pdfs(pdf_list, output_pdf):
     """
     Une varios archivos PDF en un solo archivo.
@@ -26,6 +28,113 @@ def merge_pdfs(pdf_list, output_pdf):
     print(f"PDF combinado guardado en: {output_pdf}")
 
 
+# Valores por defecto del modo de unión para muchos archivos
+LARGE_MERGE_FLUSH_EVERY = 200
+# Archivos mínimos por tramo cuando el guardado lo provoca el techo de memoria
+# (cada guardado incremental reescribe el árbol de páginas)
+MIN_MEMORY_FLUSH_FILES = 10
+
+def _memory_usage_mb():
+    """
+    Memoria residente (RSS) del proceso en MB, o None si no se puede medir
+    (se lee /proc en Linux; en otros sistemas se usa psutil si está instalado).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / 1024 ** 2
+
+def merge_pdfs_large(pdf_list, output_pdf, flush_every=LARGE_MERGE_FLUSH_EVERY, max_memory_mb=None,
+                     deduplicate=False, progress=None):
+    """
+    Une miles de archivos PDF con memoria acotada.
+
+    El documento de salida se escribe en disco por tramos: cada flush_every
+    archivos (o antes, si la memoria del proceso supera max_memory_mb) se
+    guarda de forma incremental, se cierra y se vuelve a abrir, de modo que
+    las páginas ya unidas dejan de ocupar memoria.
+
+    Args:
+        pdf_list (list): Lista de rutas de archivos PDF a combinar.
+        output_pdf (str): Ruta del archivo PDF resultante.
+        flush_every (int): Archivos de entrada por tramo.
+        max_memory_mb (float): Techo de memoria (RSS) en MB; si se supera se
+            guarda el tramo en curso sin esperar a flush_every.
+        deduplicate (bool): Al final, reescribir el PDF eliminando objetos
+            duplicados (fuentes, perfiles ICC... repetidos en cada entrada) y
+            objetos sin usar, y comprimiendo los flujos. Necesita cargar el
+            documento completo una vez.
+        progress (callable): progress(hechos, total) tras cada archivo.
+
+    Returns:
+        int: Número de páginas del PDF resultante.
+    """
+    output_document = fitz.open()
+    saved = False
+    in_chunk = 0
+    total = len(pdf_list)
+    warned = False
+
+    def flush():
+        nonlocal output_document, saved, in_chunk
+        if saved:
+            output_document.saveIncr()
+        else:
+            output_document.save(output_pdf)
+            saved = True
+        output_document.close()
+        # Vaciar también la caché de objetos de MuPDF
+        fitz.TOOLS.store_shrink(100)
+        output_document = fitz.open(output_pdf)
+        in_chunk = 0
+
+    def over_memory_limit():
+        nonlocal warned
+        if max_memory_mb is None or in_chunk < MIN_MEMORY_FLUSH_FILES:
+            return False
+        memory_mb = _memory_usage_mb()
+        if memory_mb is None:
+            if not warned:
+                warned = True
+                logger.warning("No se puede medir la memoria del proceso; solo se usa flush_every.")
+            return False
+        return memory_mb > max_memory_mb
+
+    for done, pdf in enumerate(pdf_list, 1):
+        with fitz.open(pdf) as pdf_document:
+            output_document.insert_pdf(pdf_document)
+        in_chunk += 1
+
+        if in_chunk >= flush_every or over_memory_limit():
+            flush()
+        if progress is not None:
+            progress(done, total)
+
+    if in_chunk or not saved:
+        flush()
+    page_count = len(output_document)
+    output_document.close()
+
+    if deduplicate:
+        # garbage=4 fusiona los objetos idénticos, incluidos los flujos (fuentes,
+        # perfiles ICC...); se escribe a un temporal porque un PDF no se puede
+        # reescribir sobre sí mismo
+        tmp_pdf = f"{output_pdf}.tmp"
+        with fitz.open(output_pdf) as output_document:
+            output_document.save(tmp_pdf, garbage=4, deflate=True)
+        os.replace(tmp_pdf, output_pdf)
+
+    print(f"PDF combinado guardado en: {output_pdf}")
+    return page_count
+
+
 def reorder_pdfs(selected_pdfs):
     """
     Abre una ventana para reorganizar los PDFs seleccionados.
@@ -36,6 +145,9 @@ def reorder_pdfs(selected_pdfs):
     Returns:
         None
     """
+    # tkinter solo se importa al usar la interfaz (merge_pdfs funciona sin pantalla)
+    from tkinter import Toplevel, Button, Listbox, EXTENDED
+
     def move_up():
         selected_indices = pdf_listbox.curselection()
         for idx in selected_indices:
@@ -79,12 +191,16 @@ def reorder_pdfs(selected_pdfs):
 
 def select_pdfs():
     """Permite seleccionar múltiples archivos PDF y abrir la ventana de reorganización."""
+    from tkinter import filedialog
+
     pdfs = filedialog.askopenfilenames(title="Seleccionar PDFs", filetypes=[("Archivos PDF", "*.pdf")])
     if pdfs:
         reorder_pdfs(pdfs)
 
 
 if __name__ == "__main__":
+    from tkinter import Tk
+
     root = Tk()
     root.withdraw()  # Ocultar ventana principal
     select_pdfs()
@@ -0,0 +1,226 @@
+# ocr_backend.py
+
+"""
+Motores de OCR (Tesseract) con las imágenes en memoria.
+
+pytesseract lanza un proceso tesseract por página: guarda la imagen en un PNG
+temporal, el proceso carga de nuevo los datos del idioma (spa.traineddata) y
+el texto se lee de otro archivo temporal. Aquí hay dos alternativas:
+
+- TesserocrBackend: si está instalado tesserocr (enlace a la API C de
+  Tesseract), se mantiene un grupo de reconocedores ya inicializados que se
+  reutilizan entre páginas y entre conversiones; la imagen PIL se pasa
+  directamente, sin archivos ni procesos. tesserocr libera el GIL mientras
+  reconoce, así que varios hilos reconocen en paralelo (cada uno con su
+  reconocedor).
+- SubprocessBackend: sin tesserocr, un proceso tesseract por página, pero
+  la imagen se envía por stdin como PNM (sin compresión, se codifica casi
+  sin coste) y el texto se lee de stdout, sin archivos temporales. El
+  ejecutable de Tesseract no tiene un modo persistente (lee una imagen y
+  termina), así que no se puede mantener cargado: el arranque del proceso y
+  la carga de los datos del idioma se siguen pagando en cada página. Solo
+  tesserocr los evita.
+
+get_backend(lang, config, tesseract_cmd) devuelve el mejor disponible (y lo
+reutiliza mientras no cambien los parámetros). Si tesseract_cmd no existe se
+busca tesseract en el PATH. Ambos ofrecen
+image_to_string(img) (texto) e image_to_data(img) (TSV de Tesseract, con la
+posición de cada palabra).
+"""
+
+import io
+import logging
+import os
+import queue
+import shlex
+import shutil
+import subprocess
+import threading
+
+logger = logging.getLogger(__name__)
+
+_TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n"
+
+class SubprocessBackend:
+    """Un proceso tesseract por imagen, comunicado por tuberías."""
+
+    name = "tesseract"
+
+    def __init__(self, lang: str, config: str = "", tesseract_cmd: str = "tesseract"):
+        self.lang = lang
+        self.config = config
+        self.tesseract_cmd = tesseract_cmd
+
+    def image_to_string(self, img) -> str:
+        return self._run(img)
+
+    def image_to_data(self, img) -> str:
+        return self._run(img, ["tsv"])
+
+    def _run(self, img, configfiles: list = ()) -> str:
+        # PNM (PGM en gris, PPM en color): cabecera y píxeles en bruto
+        if img.mode not in ("L", "RGB"):
+            img = img.convert("RGB")
+        buffer = io.BytesIO()
+        img.save(buffer, "PPM")
+
+        command = [self.tesseract_cmd, "stdin", "stdout", "-l", self.lang] + shlex.split(self.config)
+        command += configfiles
+        result = subprocess.run(
+            command, input=buffer.getvalue(), capture_output=True,
+            # En Windows, sin abrir una consola por cada página
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Tesseract terminó con código {result.returncode}: "
+                               f"{result.stderr.decode(errors='replace').strip()}")
+        return result.stdout.decode("utf-8", errors="replace")
+
+    def close(self) -> None:
+        pass
+
+class TesserocrBackend:
+    """
+    Grupo de reconocedores tesserocr ya inicializados. Cada llamada toma uno
+    libre (o crea uno nuevo si todos están ocupados) y lo devuelve al
+    terminar, así que hay tantos como hilos reconociendo a la vez.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str, config: str = "", tesseract_cmd: str = None):
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self.lang = lang
+        self.psm, self.oem, self.variables = _parse_config(config)
+        self.path = _tessdata_path(tesseract_cmd)
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+        # Se crea el primero ya: si el idioma o la ruta no son válidos, falla
+        # aquí y get_backend recurre al ejecutable
+        self._idle.put(self._new_api())
+
+    def _new_api(self):
+        tesserocr = self._tesserocr
+        kwargs = {"lang": self.lang}
+        if self.path:
+            kwargs["path"] = self.path
+        if self.oem is not None:
+            kwargs["oem"] = tesserocr.OEM(self.oem)
+        if self.psm is not None:
+            kwargs["psm"] = tesserocr.PSM(self.psm)
+        api = tesserocr.PyTessBaseAPI(**kwargs)
+        for name, value in self.variables.items():
+            if not api.SetVariable(name, value):
+                api.End()
+                raise ValueError(f"Variable de Tesseract desconocida: {name}")
+        with self._lock:
+            self._all.append(api)
+        return api
+
+    def image_to_string(self, img) -> str:
+        return self._run(img, lambda api: api.GetUTF8Text())
+
+    def image_to_data(self, img) -> str:
+        # Misma cabecera que la salida tsv del ejecutable
+        return _TSV_HEADER + self._run(img, lambda api: api.GetTSVText(0))
+
+    def _run(self, img, get_result):
+        try:
+            api = self._idle.get_nowait()
+        except queue.Empty:
+            api = self._new_api()
+        try:
+            api.SetImage(img)
+            return get_result(api)
+        finally:
+            api.Clear()
+            self._idle.put(api)
+
+    def close(self) -> None:
+        with self._lock:
+            for api in self._all:
+                api.End()
+            self._all.clear()
+        self._idle = queue.LifoQueue()
+
+def _parse_config(config: str) -> tuple:
+    """
+    Traduce las opciones de línea de comandos de Tesseract que tienen
+    equivalente en la API (--psm N, --oem N, -c variable=valor) a
+    (psm, oem, {variable: valor}). Cualquier otra opción lanza ValueError.
+    """
+    psm = oem = None
+    variables = {}
+    args = shlex.split(config or "")
+    while args:
+        arg = args.pop(0)
+        if arg in ("--psm", "--oem", "-c") and not args:
+            raise ValueError(f"Falta el valor de {arg}.")
+        if arg == "--psm":
+            psm = int(args.pop(0))
+        elif arg == "--oem":
+            oem = int(args.pop(0))
+        elif arg == "-c":
+            name, _, value = args.pop(0).partition("=")
+            variables[name] = value
+        else:
+            raise ValueError(f"Opción de Tesseract no admitida por tesserocr: {arg}")
+    return psm, oem, variables
+
+def _find_tesseract(tesseract_cmd: str = None) -> str:
+    """
+    Ejecutable de Tesseract: la ruta configurada si existe; si no (p. ej. la
+    ruta de Windows en Linux o macOS), el tesseract que haya en el PATH. Si
+    tampoco lo hay, la ruta configurada, para que el error la indique.
+    """
+    if tesseract_cmd and os.path.isfile(tesseract_cmd):
+        return tesseract_cmd
+    found = (tesseract_cmd and shutil.which(tesseract_cmd)) or shutil.which("tesseract")
+    return found or tesseract_cmd or "tesseract"
+
+def _tessdata_path(tesseract_cmd: str = None):
+    """
+    Carpeta tessdata: TESSDATA_PREFIX si está definida, si no la que hay
+    junto al ejecutable (instalación de Windows), o None para la de tesserocr.
+    """
+    if os.environ.get("TESSDATA_PREFIX"):
+        return os.environ["TESSDATA_PREFIX"]
+    if tesseract_cmd:
+        candidate = os.path.join(os.path.dirname(tesseract_cmd), "tessdata")
+        if os.path.isdir(candidate):
+            return candidate
+    return None
+
+_backend = None
+_backend_params = None
+_backend_lock = threading.Lock()
+
+def get_backend(lang: str, config: str = "", tesseract_cmd: str = "tesseract"):
+    """
+    Motor de OCR para estos parámetros: TesserocrBackend si tesserocr está
+    instalado y admite la configuración, si no SubprocessBackend. Se reutiliza
+    el mismo mientras los parámetros no cambien, de modo que los
+    reconocedores siguen cargados entre conversiones.
+    """
+    global _backend, _backend_params
+    params = (lang, config, tesseract_cmd)
+    with _backend_lock:
+        if _backend is not None and _backend_params == params:
+            return _backend
+        if _backend is not None:
+            _backend.close()
+
+        tesseract_cmd = _find_tesseract(tesseract_cmd)
+        try:
+            _backend = TesserocrBackend(lang, config, tesseract_cmd)
+        except ImportError:
+            _backend = SubprocessBackend(lang, config, tesseract_cmd)
+        except Exception as e:
+            logger.warning("No se pudo iniciar tesserocr (%s); se usa el ejecutable de Tesseract.", e)
+            _backend = SubprocessBackend(lang, config, tesseract_cmd)
+        _backend_params = params
+        logger.info("Motor de OCR: %s (%s)", _backend.name, tesseract_cmd)
+        return _backend
@@ -0,0 +1,100 @@
+# ocr_cache.py
+
+"""
+Caché persistente de resultados de OCR por página (SQLite).
+
+La clave es el hash de los píxeles de la página rasterizada (más su tamaño y
+número de canales) junto con el idioma y la configuración de Tesseract. Las
+páginas repetidas (condiciones generales, hojas separadoras en blanco,
+portadas) cuestan un hash en lugar de una ejecución de Tesseract.
+
+La base de datos admite varios procesos a la vez (modo WAL) y guarda también
+los aciertos y fallos acumulados para calcular la tasa de aciertos.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+from result_cache import default_cache_dir
+
+OCR_CACHE_FILENAME = "ocr.sqlite"
+
+class OcrCache:
+    """
+    Caché de texto OCR por página. Uso típico:
+
+        key = ocr_cache.key(pix.samples_mv, pix.width, pix.height, pix.n, "spa", "")
+        text = ocr_cache.get(key)
+        if text is None:
+            text = ...OCR...
+            ocr_cache.put(key, text)
+
+    hits y misses cuentan los accesos de esta instancia; stats() devuelve los
+    acumulados de todas las ejecuciones.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(default_cache_dir(), OCR_CACHE_FILENAME)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        # Se usa desde el hilo de la conversión (que en la GUI no es el que la crea)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS ocr (key TEXT PRIMARY KEY, text TEXT NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._conn.execute("INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0)")
+
+    @staticmethod
+    def key(samples, width: int, height: int, channels: int, lang: str, config: str) -> str:
+        """Hash de los píxeles (bytes o memoryview) y de los parámetros del OCR."""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{width}x{height}x{channels}|{lang}|{config}|".encode())
+        digest.update(samples)
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """Texto guardado para la clave, o None si no está en caché."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT text FROM ocr WHERE key = ?", (key,)).fetchone()
+            counter = "hits" if row is not None else "misses"
+            self._conn.execute("UPDATE stats SET value = value + 1 WHERE name = ?", (counter,))
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, text: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO ocr VALUES (?, ?)", (key, text))
+
+    def hit_rate(self) -> float:
+        """Tasa de aciertos de esta instancia (0 a 1)."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """Aciertos, fallos y páginas guardadas, acumulados entre ejecuciones."""
+        with self._lock:
+            stats = dict(self._conn.execute("SELECT name, value FROM stats").fetchall())
+            stats["pages"] = self._conn.execute("SELECT COUNT(*) FROM ocr").fetchone()[0]
+        return stats
+
+    def report(self, stats: dict = None) -> str:
+        """Resumen legible de las estadísticas (por defecto, las acumuladas)."""
+        stats = stats if stats is not None else self.stats()
+        lookups = stats["hits"] + stats["misses"]
+        rate = stats["hits"] / lookups * 100 if lookups else 0
+        report = f"Caché OCR: {stats['hits']} aciertos, {stats['misses']} fallos ({rate:.0f}% de aciertos)"
+        if "pages" in stats:
+            report += f", {stats['pages']} páginas guardadas"
+        return report
+
+    def close(self) -> None:
+        self._conn.close()
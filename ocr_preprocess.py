@@ -0,0 +1,121 @@
+# ocr_preprocess.py
+
+"""
+Preparación de las páginas rasterizadas antes del OCR.
+
+- binarize: blanco y negro con el umbral de Otsu, calculado sobre el
+  histograma de Pillow (256 valores) y aplicado con Image.point, sin recorrer
+  los píxeles en Python. Quita el ruido de fondo de los escaneos y reduce lo
+  que Tesseract tiene que umbralizar por su cuenta.
+- deskew: endereza páginas escaneadas torcidas. El ángulo se estima con NumPy
+  sobre una copia reducida: para cada ángulo candidato se proyectan los
+  píxeles oscuros sobre el eje vertical inclinado y se elige el ángulo con el
+  perfil más concentrado (las líneas de texto forman picos). Necesita NumPy
+  (dependencia opcional); sin él la página se deja como está y se avisa una
+  vez por logging (ver deskew_available).
+
+Las funciones reciben y devuelven imágenes PIL en modo "L".
+"""
+
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+# Ángulo máximo (grados) que se corrige y paso de la búsqueda
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.25
+# Lado mayor de la copia reducida sobre la que se estima el ángulo
+DESKEW_SAMPLE_SIZE = 1000
+# Píxeles oscuros mínimos para estimar el ángulo (páginas casi en blanco no)
+DESKEW_MIN_PIXELS = 500
+
+_warned_numpy = False
+
+def otsu_threshold(img) -> int:
+    """Umbral de Otsu (0-255) de una imagen en gris, a partir de su histograma."""
+    histogram = img.histogram()[:256]
+    total = sum(histogram)
+    sum_all = sum(value * count for value, count in enumerate(histogram))
+    best_threshold, best_variance = 128, -1.0
+    weight_back = sum_back = 0
+    for value, count in enumerate(histogram):
+        weight_back += count
+        if weight_back == 0:
+            continue
+        weight_fore = total - weight_back
+        if weight_fore == 0:
+            break
+        sum_back += value * count
+        mean_back = sum_back / weight_back
+        mean_fore = (sum_all - sum_back) / weight_fore
+        variance = weight_back * weight_fore * (mean_back - mean_fore) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = value, variance
+    return best_threshold
+
+def binarize(img):
+    """Blanco (255) y negro (0) con el umbral de Otsu; sigue en modo "L"."""
+    threshold = otsu_threshold(img)
+    return img.point(lambda value: 255 if value > threshold else 0)
+
+def deskew_available() -> bool:
+    """
+    ¿Se puede enderezar (NumPy instalado)? Si no, lo avisa una vez por
+    logging; conviene llamarla al pedir deskew, antes de procesar páginas.
+    """
+    global _warned_numpy
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        if not _warned_numpy:
+            _warned_numpy = True
+            logger.warning("NumPy no está instalado: no se corrige la inclinación de las páginas "
+                           "(pip install numpy).")
+        return False
+    return True
+
+def estimate_skew(img):
+    """
+    Ángulo (grados, positivo = girado en sentido antihorario) de las líneas
+    de texto de la página, entre -DESKEW_MAX_ANGLE y DESKEW_MAX_ANGLE, o None
+    si no se puede estimar (sin NumPy o sin texto suficiente).
+    """
+    if not deskew_available():
+        return None
+    import numpy as np
+
+    factor = max(1, math.ceil(max(img.size) / DESKEW_SAMPLE_SIZE))
+    sample = img.reduce(factor) if factor > 1 else img
+    pixels = np.asarray(sample)
+    ys, xs = np.nonzero(pixels <= otsu_threshold(sample))
+    if len(ys) < DESKEW_MIN_PIXELS:
+        return None
+    ys = ys.astype(np.float64)
+    xs = xs.astype(np.float64)
+
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-DESKEW_MAX_ANGLE, DESKEW_MAX_ANGLE + DESKEW_STEP / 2, DESKEW_STEP):
+        # Fila de cada píxel oscuro si la página estuviera girada `angle`
+        rows = np.rint(ys + xs * math.tan(math.radians(angle))).astype(np.int64)
+        counts = np.bincount(rows - rows.min())
+        score = float(np.dot(counts, counts))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+def deskew(img):
+    """Gira la página para dejar horizontales las líneas de texto."""
+    angle = estimate_skew(img)
+    if angle is None or abs(angle) < DESKEW_STEP / 2:
+        return img
+    from PIL import Image
+    return img.rotate(-angle, resample=Image.Resampling.BILINEAR, expand=True, fillcolor=255)
+
+def preprocess(img, binarize_image: bool = False, deskew_image: bool = False):
+    """Aplica a la imagen en gris las etapas activadas (primero deskew)."""
+    if deskew_image:
+        img = deskew(img)
+    if binarize_image:
+        img = binarize(img)
+    return img
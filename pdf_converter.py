@@ -13,16 +13,14 @@ Requerimientos:
 
 import os
 import io
-import fitz  # PyMuPDF
-import pytesseract
-from PIL import Image
-from docx import Document
-from docx.shared import Inches
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import tkinter as tk
 from tkinter import ttk, filedialog, simpledialog, messagebox
 
 # -------------------------------------------------------------------
 # Funciones de cada funcionalidad
+# (las librerías pesadas se importan dentro de cada función, al usarla)
 # -------------------------------------------------------------------
 
 def images_to_pdf(input_path: str, output_path: str) -> None:
@@ -30,6 +28,8 @@ def images_to_pdf(input_path: str, output_path: str) -> None:
     Convierte una carpeta con imágenes (o una sola imagen)
     en un único archivo PDF.
     """
+    from PIL import Image
+
     valid_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.gif']
     images = []
 
@@ -59,6 +59,12 @@ def pdf_to_word(pdf_path: str, output_folder: str, use_ocr: bool = False) -> Non
     Convierte un PDF a un documento Word (.docx).
     - Si use_ocr = True, aplica OCR en páginas sin texto legible.
     """
+    import fitz  # PyMuPDF
+    import pytesseract
+    from PIL import Image
+    from docx import Document
+    from docx.shared import Inches
+
     pdf_document = fitz.open(pdf_path)
     doc = Document()
     pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
@@ -99,24 +105,64 @@ def pdf_to_word(pdf_path: str, output_folder: str, use_ocr: bool = False) -> Non
     messagebox.showinfo("Proceso completado", f"Documento Word guardado en:\n{output_path}")
 
 
-def pdf_to_jpg(pdf_path: str, output_folder: str, dpi: int = 300) -> None:
+def _render_page(pdf_document, page_number: int, output_folder: str, pdf_name: str, dpi: int) -> None:
+    """
+    Renderiza una página y la guarda como JPG con el nombre {pdf_name}_page_{n}.jpg.
+    """
+    from PIL import Image
+
+    page = pdf_document.load_page(page_number)
+    pix = page.get_pixmap(dpi=dpi)
+    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+    # Nombre de salida con número de página
+    output_path = os.path.join(output_folder, f"{pdf_name}_page_{page_number + 1}.jpg")
+    img.save(output_path, "JPEG", quality=95)
+
+
+def _render_page_block(pdf_path: str, output_folder: str, dpi: int, page_numbers: list) -> None:
+    """
+    Renderiza un bloque de páginas dentro de un proceso del pool.
+    Cada proceso abre su propio fitz.Document.
+    """
+    import fitz  # PyMuPDF
+
+    pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    with fitz.open(pdf_path) as pdf_document:
+        for page_number in page_numbers:
+            _render_page(pdf_document, page_number, output_folder, pdf_name, dpi)
+
+
+def pdf_to_jpg(pdf_path: str, output_folder: str, dpi: int = 300, workers: int = 1) -> None:
     """
     Convierte cada página de un PDF en una imagen JPG.
+    - Si workers > 1, las páginas se reparten entre varios procesos.
     """
+    import fitz  # PyMuPDF
+
     pdf_document = fitz.open(pdf_path)
     total_pages = len(pdf_document)
     pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
 
-    for page_number in range(total_pages):
-        page = pdf_document.load_page(page_number)
-        pix = page.get_pixmap(dpi=dpi)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    if workers > 1 and total_pages > 1:
+        pdf_document.close()
+        # Bloques contiguos, varios por proceso para repartir mejor la carga
+        block_size = -(-total_pages // (workers * 4))
+        blocks = [list(range(start, min(start + block_size, total_pages)))
+                  for start in range(0, total_pages, block_size)]
+        with ProcessPoolExecutor(max_workers=min(workers, total_pages)) as executor:
+            futures = [
+                executor.submit(_render_page_block, pdf_path, output_folder, dpi, block)
+                for block in blocks
+            ]
+            for future in futures:
+                future.result()
+    else:
+        for page_number in range(total_pages):
+            _render_page(pdf_document, page_number, output_folder, pdf_name, dpi)
 
-        # Nombre de salida con número de página
-        output_path = os.path.join(output_folder, f"{pdf_name}_page_{page_number + 1}.jpg")
-        img.save(output_path, "JPEG", quality=95)
+        pdf_document.close()
 
-    pdf_document.close()
     messagebox.showinfo(
         "Proceso completado",
         f"Imágenes JPG generadas en la carpeta:\n{output_folder}"
@@ -127,6 +173,8 @@ def extract_pages_from_pdf(input_pdf: str, output_pdf: str, start_page: int, end
     """
     Extrae páginas específicas de un archivo PDF y las guarda en un nuevo PDF.
     """
+    import fitz  # PyMuPDF
+
     pdf_document = fitz.open(input_pdf)
 
     if (
@@ -177,6 +225,7 @@ class AppUnificada(tk.Tk):
         self.output_path_var = tk.StringVar()
         self.ocr_var = tk.BooleanVar(value=False)
         self.dpi_var = tk.StringVar(value="300")  # Solo para PDF->JPG
+        self.workers_var = tk.StringVar(value="1")  # Procesos para PDF->JPG
         self.start_page_var = tk.StringVar()
         self.end_page_var = tk.StringVar()
 
@@ -235,6 +284,8 @@ class AppUnificada(tk.Tk):
         # 2) DPI
         tk.Label(self.options_frame, text="DPI (para PDF->JPG):").grid(row=1, column=0, padx=5, pady=5, sticky="e")
         tk.Entry(self.options_frame, textvariable=self.dpi_var, width=6).grid(row=1, column=1, padx=5, pady=5, sticky="w")
+        tk.Label(self.options_frame, text="Procesos:").grid(row=1, column=2, padx=5, pady=5, sticky="e")
+        tk.Entry(self.options_frame, textvariable=self.workers_var, width=4).grid(row=1, column=3, padx=5, pady=5, sticky="w")
 
         # 3) Rango de páginas (para extraer páginas)
         tk.Label(self.options_frame, text="Página inicial:").grid(row=2, column=0, padx=5, pady=5, sticky="e")
@@ -373,7 +424,8 @@ class AppUnificada(tk.Tk):
 
             elif option == "pdf_to_jpg":
                 dpi_value = int(self.dpi_var.get())
-                pdf_to_jpg(input_path, output_path, dpi=dpi_value)
+                workers_value = max(1, int(self.workers_var.get()))
+                pdf_to_jpg(input_path, output_path, dpi=dpi_value, workers=workers_value)
 
             elif option == "extract_pages":
                 start_page_str = self.start_page_var.get().strip()
@@ -411,5 +463,6 @@ class AppUnificada(tk.Tk):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = AppUnificada()
     app.mainloop()
@@ -1,38 +1,344 @@
 # pdf_to_jpg.py
 
 import os
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from PIL import Image
 import fitz  # PyMuPDF
-from tkinter import messagebox
+import dialogs
+from encoders import encode, get_encoder, combine_tiff
+from tracing import NULL_TRACER, Tracer
 
-def pdf_to_jpg(pdf_path: str, output_folder: str, dpi: int = 300) -> None:
+logger = logging.getLogger(__name__)
+
+def _variant_suffixes(extra_dpis: list = None, thumbnail_size: int = None) -> list:
+    """Sufijos de los archivos de tamaños reducidos (_150dpi, _thumb...)."""
+    suffixes = [f"_{extra_dpi}dpi" for extra_dpi in sorted(extra_dpis or [], reverse=True)]
+    if thumbnail_size:
+        suffixes.append("_thumb")
+    return suffixes
+
+def _variant_sizes(width: int, height: int, dpi: int, extra_dpis: list = None, thumbnail_size: int = None) -> list:
+    """
+    [(sufijo, (ancho, alto))] de los tamaños reducidos de una página de
+    width x height píxeles renderizada a `dpi`, de mayor a menor: uno por
+    cada DPI de extra_dpis y una miniatura cuyo lado mayor es thumbnail_size.
+    """
+    sizes = [
+        (f"_{extra_dpi}dpi", (max(1, round(width * extra_dpi / dpi)), max(1, round(height * extra_dpi / dpi))))
+        for extra_dpi in sorted(extra_dpis or [], reverse=True)
+    ]
+    if thumbnail_size:
+        scale = min(1, thumbnail_size / max(width, height))
+        sizes.append(("_thumb", (max(1, round(width * scale)), max(1, round(height * scale)))))
+    return sizes
+
+def _downsample(img, size: tuple):
+    """
+    Reduce la imagen a `size` (±1 píxel). La parte entera del factor se hace
+    con Image.reduce (media de bloques de píxeles, muy rápida) y solo el resto,
+    si lo hay, con un remuestreo de caja sobre la imagen ya reducida.
+    """
+    factor = min(img.width // size[0], img.height // size[1])
+    if factor >= 2:
+        img = img.reduce(factor)
+    if abs(img.width - size[0]) > 1 or abs(img.height - size[1]) > 1:
+        img = img.resize(size, Image.Resampling.BOX)
+    return img
+
+def _render_page(pdf_document, page_number: int, output_folder: str, pdf_name: str, dpi: int,
+                 fmt: str = "jpg", color_mode: str = "rgb", options: dict = None,
+                 extra_dpis: list = None, thumbnail_size: int = None, tracer=NULL_TRACER) -> None:
+    """
+    Renderiza una página y la guarda con el nombre {pdf_name}_page_{n} y la
+    extensión del formato (ver encoders). Los tamaños reducidos (extra_dpis,
+    thumbnail_size) se obtienen de la misma imagen, reduciéndola en memoria
+    cada uno a partir del anterior, sin volver a renderizar la página.
+    """
+    page = pdf_document.load_page(page_number)
+    # Si la salida va a ser gris o bitonal, se renderiza directamente en gris
+    # (un canal en lugar de tres)
+    with tracer.stage("get_pixmap", page_number) as stage:
+        if color_mode in ("gray", "bitonal"):
+            pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+            mode = "L"
+        else:
+            pix = page.get_pixmap(dpi=dpi)
+            mode = "RGB"
+        stage.bytes = len(pix.samples_mv)
+    # La imagen PIL se construye desde el búfer del pixmap (samples_mv), sin la
+    # copia en bytes que hace pix.samples. Solo en gris ("L") comparte la
+    # memoria del pixmap: en RGB Pillow la desempaqueta a su formato interno
+    # (RGBX), que es una copia. pix.save(..., jpg_quality=...) evitaría esa
+    # copia, pero el codificador JPEG de MuPDF es más lento que el de Pillow
+    # y no admite las opciones de encoders (progressive, subsampling...)
+    img = Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, "raw", mode, pix.stride, 1)
+
+    # Nombre de salida con número de página
+    output_base = os.path.join(output_folder, f"{pdf_name}_page_{page_number + 1}")
+    with tracer.stage("encode", page_number) as stage:
+        path = encode(img, output_base, fmt, color_mode, **(options or {}))
+        if tracer.enabled:
+            stage.bytes = os.path.getsize(path)
+
+    variant = img
+    for suffix, size in _variant_sizes(pix.width, pix.height, dpi, extra_dpis, thumbnail_size):
+        with tracer.stage("downsample", page_number):
+            variant = _downsample(variant, size)
+        with tracer.stage("encode_variant", page_number) as stage:
+            path = encode(variant, output_base + suffix, fmt, color_mode, **(options or {}))
+            if tracer.enabled:
+                stage.bytes = os.path.getsize(path)
+
+    # En gris la imagen usa la memoria del pixmap: hay que soltarla antes que él
+    del img, variant
+
+def _render_page_block(pdf_path: str, output_folder: str, dpi: int, page_numbers: list,
+                       fmt: str = "jpg", color_mode: str = "rgb", options: dict = None,
+                       extra_dpis: list = None, thumbnail_size: int = None, trace: bool = False) -> tuple:
+    """
+    Renderiza un bloque de páginas dentro de un proceso del pool.
+    Cada proceso abre su propio fitz.Document (no se puede compartir entre procesos).
+    Devuelve (errores, registros de traza): la lista de errores (número de
+    página, mensaje) para que el proceso principal los muestre y, si trace =
+    True, los tiempos por etapa de las páginas del bloque.
+    """
+    errors = []
+    pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    tracer = Tracer() if trace else NULL_TRACER
+
+    with fitz.open(pdf_path) as pdf_document:
+        for page_number in page_numbers:
+            try:
+                _render_page(pdf_document, page_number, output_folder, pdf_name, dpi, fmt, color_mode, options,
+                             extra_dpis, thumbnail_size, tracer)
+            except Exception as e:
+                errors.append((page_number, str(e)))
+
+    return errors, [tuple(record) for record in tracer.records] if trace else []
+
+# Tamaño máximo de un bloque en modo paralelo: bloques pequeños dan un
+# progreso más fino y permiten cancelar sin esperar a un bloque enorme
+MAX_BLOCK_PAGES = 16
+
+def _split_pages(page_numbers: list, workers: int) -> list:
+    """
+    Divide la lista de páginas en bloques contiguos (varios por proceso para
+    repartir mejor la carga cuando unas páginas son más pesadas que otras).
+    """
+    total_pages = len(page_numbers)
+    n_blocks = min(total_pages, max(workers * 4, -(-total_pages // MAX_BLOCK_PAGES)))
+    block_size, remainder = divmod(total_pages, n_blocks)
+    blocks = []
+    start = 0
+    for i in range(n_blocks):
+        end = start + block_size + (1 if i < remainder else 0)
+        blocks.append(page_numbers[start:end])
+        start = end
+    return blocks
+
+def _output_path(output_folder: str, pdf_name: str, page_number: int, extension: str = ".jpg") -> str:
+    return os.path.join(output_folder, f"{pdf_name}_page_{page_number + 1}{extension}")
+
+def _page_is_done(checkpoint, output_folder: str, pdf_name: str, page_number: int, extension: str) -> bool:
     """
-    Convierte cada página de un PDF en una imagen JPG.
+    Una página registrada en el checkpoint solo se da por hecha si su imagen
+    sigue existiendo y tiene el tamaño registrado (no se cortó a medias).
     """
+    record = checkpoint.records.get(page_number)
+    if record is None:
+        return False
+    try:
+        return os.path.getsize(_output_path(output_folder, pdf_name, page_number, extension)) == record["bytes"]
+    except OSError:
+        return False
+
+def pdf_to_jpg(pdf_path: str, output_folder: str, dpi: int = 300, workers: int = 1,
+               progress=None, cancel_event=None, cache=None, resume=False,
+               fmt="jpg", color_mode="rgb", encoder_options=None, multipage=False,
+               extra_dpis=None, thumbnail_size=None, tracer=None) -> None:
+    """
+    Convierte cada página de un PDF en una imagen (JPG por defecto).
+    - fmt, color_mode y encoder_options eligen el formato de salida y sus
+      opciones (ver encoders): "jpg", "webp", "png", "tiff-g4" o "avif";
+      color_mode "rgb", "gray", "bitonal" o "auto".
+    - Si multipage = True (solo con "tiff-g4"), al terminar las páginas se
+      juntan en un único {nombre}.tif multipágina.
+    - extra_dpis (p. ej. [150]) y thumbnail_size (lado mayor en píxeles)
+      generan además versiones reducidas de cada página
+      ({nombre}_page_{n}_150dpi, {nombre}_page_{n}_thumb) a partir de la
+      misma imagen renderizada a `dpi`, en la misma pasada.
+    - Si workers > 1, las páginas se reparten entre varios procesos.
+    - progress(hechas, total) se llama a medida que se completan páginas.
+    - Si cancel_event (threading.Event) se activa, la conversión se detiene
+      en el siguiente límite de página (de bloque, en modo paralelo).
+    - cache (result_cache.ResultCache): si el mismo PDF ya se convirtió con
+      las mismas opciones, las imágenes se restauran desde la caché.
+    - Si resume = True, las páginas terminadas se registran en un checkpoint
+      en la carpeta de salida y una nueva ejecución sobre el mismo PDF (y
+      opciones) solo convierte las páginas que faltan.
+    - tracer (tracing.Tracer): registra el tiempo de cada etapa por página
+      (get_pixmap, encode...), también desde los procesos del pool.
+    """
+    if tracer is None:
+        tracer = NULL_TRACER
+
+    try:
+        extension = get_encoder(fmt).extension
+        if multipage and fmt != "tiff-g4":
+            raise ValueError("El TIFF multipágina solo está disponible con el formato tiff-g4.")
+        if multipage and (extra_dpis or thumbnail_size):
+            raise ValueError("El TIFF multipágina no admite tamaños reducidos.")
+        if any(extra_dpi >= dpi for extra_dpi in extra_dpis or []):
+            raise ValueError("Los DPI de los tamaños reducidos deben ser menores que el DPI principal.")
+    except ValueError as e:
+        dialogs.showerror("Error", str(e))
+        return
+    encoder_options = encoder_options or {}
+    params = {"dpi": dpi, "fmt": fmt, "color_mode": color_mode, "options": encoder_options, "multipage": multipage,
+              "extra_dpis": sorted(extra_dpis or []), "thumbnail_size": thumbnail_size}
+    completed_message = f"Imágenes {fmt.upper()} generadas en la carpeta:\n{output_folder}"
+
     try:
         pdf_document = fitz.open(pdf_path)
     except Exception as e:
-        messagebox.showerror("Error", f"No se pudo abrir el PDF.\n{e}")
+        dialogs.showerror("Error", f"No se pudo abrir el PDF.\n{e}")
         return
 
     total_pages = len(pdf_document)
     pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    done = 0
+    errors = []
 
-    for page_number in range(total_pages):
-        try:
-            page = pdf_document.load_page(page_number)
-            pix = page.get_pixmap(dpi=dpi)
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    if cache is not None:
+        cache_key = cache.key(pdf_path, "pdf_to_jpg", params)
+        if cache.restore(cache_key, output_folder, pdf_name):
+            pdf_document.close()
+            if progress is not None:
+                progress(total_pages, total_pages)
+            dialogs.showinfo("Proceso completado", completed_message)
+            return
+
+    checkpoint = None
+    pending_pages = list(range(total_pages))
+    if resume:
+        from checkpoint import Checkpoint
+        from result_cache import file_digest
+        checkpoint = Checkpoint(
+            os.path.join(output_folder, f".{pdf_name}.jpg.progress.jsonl"),
+            {"source": file_digest(pdf_path), **params},
+        )
+        pending_pages = [
+            page_number for page_number in pending_pages
+            if not _page_is_done(checkpoint, output_folder, pdf_name, page_number, extension)
+        ]
+        done = total_pages - len(pending_pages)
+        if done:
+            logger.info("%s: reanudando, %d de %d páginas ya convertidas", pdf_name, done, total_pages)
+            if progress is not None:
+                progress(done, total_pages)
+
+    def page_done(page_number):
+        if checkpoint is not None:
+            output_path = _output_path(output_folder, pdf_name, page_number, extension)
+            checkpoint.add(page_number, bytes=os.path.getsize(output_path))
 
-            # Nombre de salida con número de página
-            output_path = os.path.join(output_folder, f"{pdf_name}_page_{page_number + 1}.jpg")
-            img.save(output_path, "JPEG", quality=95)
+    if workers > 1 and len(pending_pages) > 1:
+        # Cada proceso abre el PDF por su cuenta
+        pdf_document.close()
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending_pages))) as executor:
+            futures = {
+                executor.submit(_render_page_block, pdf_path, output_folder, dpi, block,
+                                fmt, color_mode, encoder_options, extra_dpis, thumbnail_size,
+                                tracer.enabled): block
+                for block in _split_pages(pending_pages, workers)
+            }
+            collected = set()
+
+            def collect(future):
+                nonlocal done
+                collected.add(future)
+                try:
+                    block_errors, block_records = future.result()
+                    errors.extend(block_errors)
+                    tracer.extend(block_records)
+                    failed_pages = {page_number for page_number, _ in block_errors}
+                    for page_number in futures[future]:
+                        if page_number not in failed_pages:
+                            page_done(page_number)
+                except Exception as e:
+                    errors.append((None, str(e)))
+                    dialogs.showerror("Error", f"Falló un proceso de conversión.\n{e}")
+                done += len(futures[future])
+                if progress is not None:
+                    progress(done, total_pages)
+
+            for future in as_completed(futures):
+                if cancel_event is not None and cancel_event.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+                collect(future)
+
+        # Al cancelar, los bloques que ya estaban en marcha terminan igualmente
+        # al cerrar el pool: sus páginas se registran para no repetirlas al reanudar
+        for future in futures:
+            if future not in collected and not future.cancelled():
+                collect(future)
+
+        for page_number, error in sorted(e for e in errors if e[0] is not None):
+            dialogs.showerror("Error", f"No se pudo convertir la página {page_number + 1}.\n{error}")
+    else:
+        for page_number in pending_pages:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            try:
+                _render_page(pdf_document, page_number, output_folder, pdf_name, dpi,
+                             fmt, color_mode, encoder_options, extra_dpis, thumbnail_size, tracer)
+                page_done(page_number)
+            except Exception as e:
+                errors.append((page_number, str(e)))
+                dialogs.showerror("Error", f"No se pudo convertir la página {page_number + 1}.\n{e}")
+            done += 1
+            if progress is not None:
+                progress(done, total_pages)
+
+        pdf_document.close()
+
+    if checkpoint is not None:
+        # Se conserva aunque la conversión haya terminado: una nueva ejecución
+        # con resume = True no vuelve a convertir nada
+        checkpoint.close()
+
+    if cancel_event is not None and cancel_event.is_set():
+        dialogs.showwarning("Cancelado", f"Conversión cancelada.\nPáginas convertidas: {done} de {total_pages}.")
+        return
+
+    output_paths = [
+        _output_path(output_folder, pdf_name, page_number, extension)
+        for page_number in range(total_pages)
+    ]
+    variant_paths = [
+        _output_path(output_folder, pdf_name, page_number, suffix + extension)
+        for page_number in range(total_pages)
+        for suffix in _variant_suffixes(extra_dpis, thumbnail_size)
+    ]
+    if multipage and not errors:
+        multipage_path = os.path.join(output_folder, f"{pdf_name}.tif")
+        try:
+            with tracer.stage("combine_tiff") as stage:
+                combine_tiff(output_paths, multipage_path, remove_pages=True)
+                if tracer.enabled:
+                    stage.bytes = os.path.getsize(multipage_path)
         except Exception as e:
-            messagebox.showerror("Error", f"No se pudo convertir la página {page_number + 1}.\n{e}")
-            continue
-
-    pdf_document.close()
-    messagebox.showinfo(
-        "Proceso completado",
-        f"Imágenes JPG generadas en la carpeta:\n{output_folder}"
-    )
+            dialogs.showerror("Error", f"No se pudo crear el TIFF multipágina.\n{e}")
+            return
+        output_paths = [multipage_path]
+        if checkpoint is not None:
+            checkpoint.remove()
+
+    # Solo se guardan en caché las conversiones completas y sin errores
+    if cache is not None and not errors:
+        cache.store(cache_key, output_paths + variant_paths, pdf_name)
+
+    dialogs.showinfo("Proceso completado", completed_message)
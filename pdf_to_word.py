@@ -3,12 +3,18 @@
 import os
 import io
 import sys
+import logging
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from PIL import Image
 from docx import Document
 from docx.shared import Inches
+from docx.oxml.shape import CT_Inline
 import fitz  # PyMuPDF
-import pytesseract
-from tkinter import messagebox
+import dialogs
+from tracing import NULL_TRACER
+
+logger = logging.getLogger(__name__)
 
 def resource_path(relative_path):
     """Obtiene la ruta absoluta del recurso, funciona para scripts y para PyInstaller."""
@@ -20,62 +26,557 @@ def resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
-# Configurar ruta a Tesseract
-pytesseract.pytesseract.tesseract_cmd = os.path.join("C:\\Program Files\\Tesseract-OCR", "tesseract.exe")
-# pytesseract.pytesseract.tesseract_cmd = resource_path(os.path.join('assets', 'tesseract.exe'))
+# Ruta a Tesseract (el motor de OCR solo se carga si se usa OCR). Si no
+# existe, se usa el tesseract del PATH (ver ocr_backend)
+TESSERACT_CMD = os.path.join("C:\\Program Files\\Tesseract-OCR", "tesseract.exe")
+# TESSERACT_CMD = resource_path(os.path.join('assets', 'tesseract.exe'))
+
+# Idioma y configuración adicional del OCR
+OCR_LANG = 'spa'
+OCR_CONFIG = ''
+
+def _ocr_image(img) -> str:
+    """
+    Aplica OCR (Tesseract, español) a una imagen PIL, en memoria. Con
+    tesserocr instalado se reutilizan reconocedores ya cargados; si no, se
+    llama al ejecutable (ver ocr_backend).
+    """
+    from ocr_backend import get_backend
+    return get_backend(OCR_LANG, OCR_CONFIG, TESSERACT_CMD).image_to_string(img)
+
+# Fracción de la página cubierta por imágenes a partir de la cual una página
+# con texto se considera mixta
+MIXED_IMAGE_RATIO = 0.5
+
+def classify_page(page) -> str:
+    """
+    Clasifica una página sin extraer su texto ni rasterizarla:
+    - "text": tiene fuentes y apenas imágenes.
+    - "mixed": tiene fuentes y las imágenes cubren buena parte de la página
+      (p. ej. un escaneo con capa de texto).
+    - "image": no tiene fuentes pero sí imágenes o dibujos (escaneo, texto
+      convertido en trazos...).
+    - "empty": no tiene fuentes, imágenes ni contenido.
+    """
+    has_fonts = bool(page.get_fonts())
+    page_area = abs(page.rect) or 1
+    image_area = 0
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"]) & page.rect
+        image_area += abs(bbox)
+    image_ratio = min(image_area / page_area, 1.0)
+
+    if has_fonts:
+        return "mixed" if image_ratio >= MIXED_IMAGE_RATIO else "text"
+    if image_ratio > 0 or page.read_contents().strip():
+        return "image"
+    return "empty"
+
+def classify_pages(pdf_document) -> list:
+    """Clasifica todas las páginas del documento (ver classify_page)."""
+    return [classify_page(page) for page in pdf_document]
+
+# Resolución del rasterizado para OCR: la de la imagen escaneada de la página,
+# limitada a [OCR_MIN_DPI, OCR_MAX_DPI] (por debajo Tesseract pierde letras
+# pequeñas; por encima solo se inventan píxeles). Las páginas sin imágenes
+# (texto convertido en trazos) se rasterizan a OCR_DEFAULT_DPI.
+OCR_DEFAULT_DPI = 300
+OCR_MIN_DPI = 200
+OCR_MAX_DPI = 400
+
+def ocr_dpi(page) -> int:
+    """
+    DPI al que rasterizar la página para OCR, según la resolución efectiva
+    (píxeles por pulgada en la página) de su imagen más grande.
+    """
+    best_area = 0
+    native_dpi = None
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"])
+        area = abs(bbox)
+        if area > best_area and info["width"] and info["height"]:
+            best_area = area
+            # Con el área se obtiene la misma resolución aunque la imagen esté girada
+            native_dpi = 72 * ((info["width"] * info["height"]) / area) ** 0.5
+    if native_dpi is None:
+        return OCR_DEFAULT_DPI
+    return int(min(max(round(native_dpi), OCR_MIN_DPI), OCR_MAX_DPI))
+
+def _ocr_pixmap(page):
+    """Rasteriza la página para OCR, directamente en gris (un canal) y al DPI de ocr_dpi."""
+    return page.get_pixmap(dpi=ocr_dpi(page), colorspace=fitz.csGRAY)
+
+# Fracción mínima de la página que debe cubrir una imagen para considerarla
+# el escaneo de la página completa
+FULL_PAGE_IMAGE_RATIO = 0.95
+# Formatos de imagen extraída que Pillow decodifica (JBIG2, por ejemplo, no)
+EMBEDDED_OCR_FORMATS = {"jpeg", "jpg", "png", "tiff", "tif", "bmp", "pnm", "pbm", "pgm", "ppm"}
+
+def full_page_image(page):
+    """
+    Si la página es un escaneo (una única imagen, sin girar ni máscara, que
+    la cubre entera), devuelve su entrada de page.get_image_info() con su
+    "xref"; si no, None.
+    """
+    if page.rotation:
+        return None
+    # get_image_info(xrefs=True) decodifica cada imagen para calcular su hash:
+    # con una sola imagen en la página, su xref es el de get_images()
+    images = page.get_images()
+    infos = page.get_image_info()
+    if len(images) != 1 or len(infos) != 1:
+        return None
+    info = infos[0]
+    a, b, c, d, _, _ = info["transform"]
+    if info["has-mask"] or b or c or a <= 0 or d <= 0:
+        return None
+    if abs(fitz.Rect(info["bbox"]) & page.rect) < FULL_PAGE_IMAGE_RATIO * abs(page.rect):
+        return None
+    return dict(info, xref=images[0][0])
+
+def _embedded_ocr_size(page, info) -> tuple:
+    """
+    Tamaño en píxeles al que decodificar la imagen de full_page_image para
+    el OCR: el suyo, salvo que su resolución quede fuera de
+    [OCR_MIN_DPI, OCR_MAX_DPI] (ver ocr_dpi).
+    """
+    width, height = info["width"], info["height"]
+    native_dpi = 72 * (width * height / abs(fitz.Rect(info["bbox"]))) ** 0.5
+    target_dpi = ocr_dpi(page)
+    if target_dpi == round(native_dpi):
+        return width, height
+    scale = target_dpi / native_dpi
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def _decode_for_ocr(image_bytes: bytes, size: tuple):
+    """Decodifica la imagen extraída en gris, reescalada a `size` si hace falta."""
+    img = Image.open(io.BytesIO(image_bytes))
+    # Con JPEG, la decodificación sale directamente en gris (y reducida por
+    # la DCT si size es mucho menor)
+    img.draft("L", size)
+    img = img.convert("L")
+    if img.size != size:
+        img = img.resize(size, Image.Resampling.LANCZOS)
+    return img
+
+def _needs_ocr(page_type: str, text: str) -> bool:
+    """
+    Se hace OCR de toda página no vacía sin texto extraíble: las de imagen y
+    también las de texto o mixtas cuyas fuentes no producen texto (p. ej.
+    fuentes heredadas de unos /Resources compartidos).
+    """
+    return page_type != "empty" and not text.strip()
 
-def pdf_to_word(pdf_path: str, output_folder: str, use_ocr: bool = False) -> None:
+# Ancho de las imágenes en el documento Word
+PICTURE_WIDTH = Inches(5)
+
+# Bytes de imágenes ya extraídas del PDF (para OCR) que se retienen hasta
+# incrustarlas en el Word
+EXTRACTED_IMAGES_MAX_BYTES = 64 * 1024 * 1024
+
+# Imagen ya incrustada en el .docx: relación con su parte, nombre y tamaño
+# (EMU). Los bytes no se guardan: ya los conserva la parte de imagen de python-docx
+_CachedImage = namedtuple("_CachedImage", "rId filename cx cy")
+
+class _ImageCache:
+    """
+    Imágenes del PDF ya incrustadas en el documento, indexadas por xref.
+    Una imagen compartida por muchas páginas (logotipo, membrete) se extrae y
+    se incrusta una sola vez; las apariciones siguientes reutilizan la misma
+    parte de imagen del paquete Word. Las entradas solo guardan la referencia
+    a esa parte (unos cien bytes cada una), así que no se limitan: los bytes
+    de la imagen viven en el paquete de python-docx hasta guardar el documento.
+
+    Aparte, put_extracted retiene los bytes de imágenes extraídas para el OCR
+    que se incrustarán más tarde; esas copias sí ocupan memoria y se limitan
+    a max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = EXTRACTED_IMAGES_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._extracted = {}
+
+    def get(self, xref: int):
+        entry = self._entries.get(xref)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put_extracted(self, xref: int, data: bytes) -> None:
+        """
+        Guarda los bytes de una imagen ya extraída del PDF (p. ej. para OCR)
+        que se incrustará más tarde, para no extraerla de nuevo. Solo si caben
+        en max_bytes: el documento se construye en orden de página, así que
+        conviene conservar las primeras.
+        """
+        if xref in self._entries or xref in self._extracted or self.size + len(data) > self.max_bytes:
+            return
+        self._extracted[xref] = data
+        self.size += len(data)
+
+    def take_extracted(self, xref: int):
+        """Bytes guardados con put_extracted (y los retira), o None."""
+        data = self._extracted.pop(xref, None)
+        if data is not None:
+            self.size -= len(data)
+        return data
+
+    def put(self, xref: int, entry: _CachedImage) -> None:
+        """Registra una imagen ya incrustada."""
+        self._entries[xref] = entry
+
+def _add_picture(doc, pdf_document, image_cache: _ImageCache, xref: int,
+                 tracer=NULL_TRACER, page_number: int = None) -> None:
+    """
+    Añade al documento la imagen `xref` del PDF, usando la caché para no
+    extraerla ni incrustarla más de una vez.
+    """
+    entry = image_cache.get(xref)
+    if entry is None:
+        image_bytes = image_cache.take_extracted(xref)
+        if image_bytes is None:
+            with tracer.stage("extract_image", page_number) as stage:
+                image_bytes = pdf_document.extract_image(xref)["image"]
+                stage.bytes = len(image_bytes)
+        with tracer.stage("embed_image", page_number) as stage:
+            rId, image = doc.part.get_or_add_image(io.BytesIO(image_bytes))
+            cx, cy = image.scaled_dimensions(PICTURE_WIDTH, None)
+            stage.bytes = len(image_bytes)
+        entry = _CachedImage(rId, image.filename, cx, cy)
+        image_cache.put(xref, entry)
+
+    # Equivale a doc.add_picture(), pero con la parte de imagen ya resuelta
+    with tracer.stage("add_picture", page_number):
+        inline = CT_Inline.new_pic_inline(doc.part.next_id, entry.rId, entry.filename, entry.cx, entry.cy)
+        doc.add_paragraph().add_run()._r.add_drawing(inline)
+
+def pdf_to_word(pdf_path: str, output_folder: str, use_ocr: bool = False, ocr_workers: int = None,
+                progress=None, cancel_event=None, cache=None, ocr_cache=None, resume=False,
+                tracer=None, ocr_binarize=False, ocr_deskew=False, ocr_embedded=True,
+                layout=False) -> None:
     """
     Convierte un PDF a un documento Word (.docx).
-    - Si use_ocr = True, aplica OCR en páginas sin texto legible.
+    - Si use_ocr = True, aplica OCR en páginas sin texto legible. Antes se
+      clasifican las páginas (classify_pages) y solo se rasterizan las que no
+      están vacías y no tienen texto extraíble; el resumen se emite por logging.
+    - Las páginas se rasterizan para OCR en gris, al DPI de su imagen
+      escaneada (ocr_dpi). Con ocr_deskew se endereza la página y con
+      ocr_binarize se pasa a blanco y negro antes del OCR (ver ocr_preprocess).
+    - Con ocr_embedded, las páginas que son un único escaneo a página
+      completa (full_page_image) no se rasterizan: se extrae la imagen una
+      vez, se decodifica para el OCR a su resolución (dentro de
+      [OCR_MIN_DPI, OCR_MAX_DPI]) y los mismos bytes se incrustan en el Word.
+    - Con layout, el texto se extrae con su estructura (docx_layout): un
+      párrafo por bloque, títulos con los estilos de Word y tablas con bordes
+      como tablas. El XML del documento se genera por tramos en lugar de
+      párrafo a párrafo con python-docx.
+    - El OCR se reparte entre ocr_workers hilos (por defecto, uno por núcleo);
+      los resultados se reordenan por página antes de construir el documento.
+    - progress(hechas, total) se llama cada vez que una página tiene su texto.
+    - Si cancel_event (threading.Event) se activa, la conversión se detiene en
+      el siguiente límite de página y no se guarda el documento.
+    - cache (result_cache.ResultCache): si el mismo PDF ya se convirtió con
+      las mismas opciones, el .docx se restaura desde la caché.
+    - ocr_cache (ocr_cache.OcrCache): las páginas ya reconocidas antes (mismos
+      píxeles, idioma y configuración) toman el texto de la caché sin OCR.
+    - Si resume = True, el texto de cada página (extraído o de OCR) se guarda
+      en un checkpoint en la carpeta de salida a medida que se obtiene. Si la
+      conversión se interrumpe, una nueva ejecución sobre el mismo PDF solo
+      procesa las páginas que faltan. El checkpoint se borra al guardar el
+      documento.
+    - tracer (tracing.Tracer): registra el tiempo de cada etapa por página
+      (get_text, get_pixmap, ocr, extract_image, add_picture, save...).
     """
+    if tracer is None:
+        tracer = NULL_TRACER
+    # Identifica el rasterizado y el preprocesado en las claves de caché y
+    # en el checkpoint
+    preprocess_params = {"binarize": ocr_binarize, "deskew": ocr_deskew, "embedded": ocr_embedded}
+
     try:
         pdf_document = fitz.open(pdf_path)
     except Exception as e:
-        messagebox.showerror("Error", f"No se pudo abrir el PDF.\n{e}")
+        dialogs.showerror("Error", f"No se pudo abrir el PDF.\n{e}")
         return
 
     doc = Document()
     pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    output_path = os.path.join(output_folder, f"{pdf_name}.docx")
+    total_pages = len(pdf_document)
+    ocr_workers = ocr_workers or os.cpu_count() or 1
+    errors = []
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    def show_error(message):
+        errors.append(message)
+        dialogs.showerror("Error", message)
+
+    if cache is not None:
+        cache_key = cache.key(pdf_path, "pdf_to_word",
+                              {"ocr": use_ocr, "lang": OCR_LANG, "layout": layout, **preprocess_params})
+        if cache.restore(cache_key, output_folder, pdf_name):
+            pdf_document.close()
+            if progress is not None:
+                progress(total_pages, total_pages)
+            dialogs.showinfo("Proceso completado", f"Documento Word guardado en:\n{output_path}")
+            return
+
+    # 0) Preclasificar las páginas para rasterizar solo las que necesitan OCR
+    with tracer.stage("classify"):
+        page_types = classify_pages(pdf_document) if use_ocr else ["text"] * total_pages
+    if use_ocr:
+        counts = Counter(page_types)
+        logger.info(
+            "%s: %d páginas; texto %d, imagen %d, mixtas %d, vacías %d",
+            pdf_name, total_pages, counts["text"], counts["image"], counts["mixed"], counts["empty"],
+        )
+
+    checkpoint = None
+    if resume:
+        from checkpoint import Checkpoint
+        from result_cache import file_digest
+        checkpoint = Checkpoint(
+            os.path.join(output_folder, f".{pdf_name}.docx.pages.jsonl"),
+            {"source": file_digest(pdf_path), "ocr": use_ocr, "lang": OCR_LANG, "config": OCR_CONFIG,
+             "layout": layout, **preprocess_params},
+        )
+        if checkpoint.records:
+            logger.info("%s: reanudando, %d de %d páginas ya procesadas",
+                        pdf_name, len(checkpoint.records), total_pages)
+
+    if layout:
+        from docx_layout import extract_layout, layout_text, body_font_size, BodyWriter
+    if use_ocr and ocr_deskew:
+        # Sin NumPy no se endereza: se avisa ya, no al llegar la primera página
+        from ocr_preprocess import deskew_available
+        deskew_available()
+
+    # 1) Extraer el texto y enviar a OCR las páginas sin texto.
+    #    Tesseract corre en un subproceso, así que basta con hilos; se limita el
+    #    número de páginas rasterizadas en vuelo para acotar la memoria.
+    page_texts = []
+    # Con layout, bloques de cada página (vacíos en las de imagen, que toman el texto del OCR)
+    page_layouts = []
+    image_cache = _ImageCache()
+    ocr_futures = {}
+    ocr_keys = {}
+    pending = set()
+    done_pages = 0
+
+    def page_done(page_number=None):
+        # page_number se indica cuando el texto de la página es definitivo
+        # (las páginas con error no se registran y se reintentan al reanudar)
+        nonlocal done_pages
+        done_pages += 1
+        if checkpoint is not None and page_number is not None:
+            if layout:
+                checkpoint.add(page_number, text=page_texts[page_number], blocks=page_layouts[page_number])
+            else:
+                checkpoint.add(page_number, text=page_texts[page_number])
+        if progress is not None:
+            progress(done_pages, total_pages)
+
+    def ocr_page(img, page_number):
+        if ocr_binarize or ocr_deskew:
+            from ocr_preprocess import preprocess
+            with tracer.stage("preprocess", page_number):
+                img = preprocess(img, ocr_binarize, ocr_deskew)
+        with tracer.stage("ocr", page_number) as stage:
+            text = _ocr_image(img)
+            stage.bytes = len(text)
+        return text
 
-    for page_number in range(len(pdf_document)):
+    def ocr_embedded_page(image_bytes, size, page_number):
+        with tracer.stage("decode_image", page_number) as stage:
+            img = _decode_for_ocr(image_bytes, size)
+            stage.bytes = len(image_bytes)
+        return ocr_page(img, page_number)
+
+    def collect(future):
+        page_number = ocr_futures.pop(future)
+        try:
+            page_texts[page_number] = future.result()
+            if ocr_cache is not None:
+                ocr_cache.put(ocr_keys.pop(page_number), page_texts[page_number])
+        except Exception as e:
+            show_error(f"OCR falló en la página {page_number + 1}.\n{e}")
+            page_done()
+            return
+        page_done(page_number)
+
+    with ThreadPoolExecutor(max_workers=ocr_workers) as executor:
+        for page_number in range(total_pages):
+            if cancelled():
+                break
+            if checkpoint is not None and page_number in checkpoint.records:
+                page_texts.append(checkpoint.records[page_number]["text"])
+                page_layouts.append(checkpoint.records[page_number].get("blocks"))
+                page_done()
+                continue
+            page = pdf_document.load_page(page_number)
+            page_type = page_types[page_number]
+            # Las páginas de imagen no tienen fuentes: no hay texto que extraer
+            with tracer.stage("get_text", page_number) as stage:
+                blocks = None
+                if page_type == "image":
+                    text = ""
+                    blocks = [] if layout else None
+                elif layout:
+                    blocks = extract_layout(page)
+                    text = layout_text(blocks)
+                else:
+                    text = page.get_text()
+                stage.bytes = len(text)
+            page_texts.append(text)
+            page_layouts.append(blocks)
+
+            # Si la página lo necesita y está activado el OCR, procesarla como imagen
+            if use_ocr and _needs_ocr(page_type, text):
+                try:
+                    ocr_config = f"{OCR_CONFIG}|binarize={ocr_binarize}|deskew={ocr_deskew}"
+                    image_info = full_page_image(page) if ocr_embedded else None
+                    image_bytes = None
+                    if image_info is not None:
+                        with tracer.stage("extract_image", page_number) as stage:
+                            base_image = pdf_document.extract_image(image_info["xref"])
+                            stage.bytes = len(base_image["image"])
+                        image_cache.put_extracted(image_info["xref"], base_image["image"])
+                        if base_image["ext"] in EMBEDDED_OCR_FORMATS:
+                            image_bytes = base_image["image"]
+                            size = _embedded_ocr_size(page, image_info)
+                            key_args = (image_bytes, size[0], size[1], 0, OCR_LANG, f"{ocr_config}|embedded")
+                    if image_bytes is None:
+                        with tracer.stage("get_pixmap", page_number) as stage:
+                            pix = _ocr_pixmap(page)
+                            stage.bytes = len(pix.samples_mv)
+                        key_args = (pix.samples_mv, pix.width, pix.height, pix.n, OCR_LANG, ocr_config)
+                    if ocr_cache is not None:
+                        key = ocr_cache.key(*key_args)
+                        cached_text = ocr_cache.get(key)
+                        if cached_text is not None:
+                            page_texts[page_number] = cached_text
+                            page_done(page_number)
+                            continue
+                        ocr_keys[page_number] = key
+                    if image_bytes is None:
+                        img = Image.frombytes("L", [pix.width, pix.height], pix.samples)
+                except Exception as e:
+                    show_error(f"OCR falló en la página {page_number + 1}.\n{e}")
+                    page_done()
+                    continue
+
+                if len(pending) >= 2 * ocr_workers:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        collect(future)
+                if image_bytes is not None:
+                    # La imagen se decodifica en el hilo del OCR
+                    future = executor.submit(ocr_embedded_page, image_bytes, size, page_number)
+                else:
+                    future = executor.submit(ocr_page, img, page_number)
+                ocr_futures[future] = page_number
+                pending.add(future)
+            else:
+                page_done(page_number)
+
+        # 2) Recoger los resultados del OCR (se guardan por número de página)
+        for future in as_completed(pending):
+            if cancelled():
+                for remaining in pending:
+                    remaining.cancel()
+                break
+            collect(future)
+
+    # Al cancelar, el OCR que ya estaba en marcha termina igualmente: con
+    # checkpoint se guarda para no repetirlo al reanudar
+    if checkpoint is not None:
+        for future in list(ocr_futures):
+            if not future.cancelled():
+                collect(future)
+
+    if ocr_cache is not None and ocr_cache.hits + ocr_cache.misses:
+        logger.info(
+            "%s: caché OCR %d aciertos, %d fallos (%.0f%%)",
+            pdf_name, ocr_cache.hits, ocr_cache.misses, ocr_cache.hit_rate() * 100,
+        )
+
+    if checkpoint is not None:
+        checkpoint.close()
+
+    if cancelled():
+        pdf_document.close()
+        message = "Conversión cancelada. No se ha guardado el documento Word."
+        if checkpoint is not None:
+            message += "\nLas páginas procesadas se conservan para reanudar la conversión."
+        dialogs.showwarning("Cancelado", message)
+        return
+
+    # 3) Construir el documento Word (las imágenes extraídas para el OCR se
+    #    incrustan desde image_cache sin volver a extraerlas)
+    writer = None
+    if layout:
+        writer = BodyWriter(doc)
+        body_size = body_font_size(page_layouts)
+    for page_number in range(total_pages):
         page = pdf_document.load_page(page_number)
-        text = page.get_text()
+        text = page_texts[page_number]
         images = page.get_images(full=True)
 
-        # Si no hay texto y está activado el OCR, procesar la página como imagen
-        if use_ocr and not text.strip():
-            try:
-                pix = page.get_pixmap()
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                text = pytesseract.image_to_string(img, lang='spa')
-            except Exception as e:
-                messagebox.showerror("Error", f"OCR falló en la página {page_number + 1}.\n{e}")
-
         # Añadir texto al documento (si lo hay)
-        if text.strip():
-            doc.add_paragraph(text)
+        if writer is not None:
+            with tracer.stage("add_text", page_number) as stage:
+                if page_layouts[page_number]:
+                    writer.add_blocks(page_layouts[page_number], body_size)
+                elif text.strip():
+                    writer.add_text(text)
+                # Las imágenes se añaden con python-docx, detrás del texto ya escrito
+                if images:
+                    writer.flush()
+                stage.bytes = len(text)
+        elif text.strip():
+            with tracer.stage("add_text", page_number) as stage:
+                doc.add_paragraph(text)
+                stage.bytes = len(text)
 
         # Añadir imágenes al documento
         for img_info in images:
             xref = img_info[0]
             try:
-                base_image = pdf_document.extract_image(xref)
-                image_bytes = base_image["image"]
-                image_stream = io.BytesIO(image_bytes)
-                doc.add_picture(image_stream, width=Inches(5))
+                _add_picture(doc, pdf_document, image_cache, xref, tracer, page_number)
             except Exception as e:
-                messagebox.showerror("Error", f"No se pudo extraer una imagen en la página {page_number + 1}.\n{e}")
+                show_error(f"No se pudo extraer una imagen en la página {page_number + 1}.\n{e}")
 
         # Salto de página en Word si no es la última página
-        if page_number < len(pdf_document) - 1:
-            doc.add_page_break()
+        if page_number < total_pages - 1:
+            if writer is not None:
+                writer.add_page_break()
+            else:
+                doc.add_page_break()
+
+    if writer is not None:
+        with tracer.stage("add_text"):
+            writer.finish()
 
-    output_path = os.path.join(output_folder, f"{pdf_name}.docx")
     try:
-        doc.save(output_path)
-        messagebox.showinfo("Proceso completado", f"Documento Word guardado en:\n{output_path}")
+        with tracer.stage("save") as stage:
+            doc.save(output_path)
+            if tracer.enabled:
+                stage.bytes = os.path.getsize(output_path)
+        if checkpoint is not None:
+            checkpoint.remove()
+        # Solo se guardan en caché las conversiones sin errores
+        if cache is not None and not errors:
+            cache.store(cache_key, [output_path], pdf_name)
+        dialogs.showinfo("Proceso completado", f"Documento Word guardado en:\n{output_path}")
     except Exception as e:
-        messagebox.showerror("Error", f"No se pudo guardar el documento Word.\n{e}")
+        dialogs.showerror("Error", f"No se pudo guardar el documento Word.\n{e}")
     finally:
         pdf_document.close()
@@ -0,0 +1,251 @@
+# result_cache.py
+
+"""
+Caché en disco de resultados de conversión, entre ejecuciones.
+
+La clave combina el hash del contenido del PDF de entrada (no su nombre ni su
+ruta) con la operación y sus parámetros (DPI, OCR, idioma...). Si el mismo
+PDF vuelve a llegar, aunque sea por otro canal y con otro nombre, los archivos
+de salida se restauran copiándolos desde la caché en lugar de convertirlo de
+nuevo.
+
+Estructura de la carpeta de caché:
+    entries/<clave>/manifest.json   archivos, tamaño y último uso
+    entries/<clave>/<archivos>      salidas guardadas
+    stats.json                      aciertos, fallos y bytes ahorrados
+    stats.json.lock                 cerrojo para actualizar stats.json desde
+                                    varios procesos a la vez (cli --jobs)
+
+El tamaño total se limita a max_bytes: al guardar una entrada nueva se
+eliminan las menos usadas recientemente (LRU).
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+
+# Tamaño máximo por defecto de la caché (2 GiB)
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Tamaño de bloque para calcular el hash sin cargar el archivo en memoria
+HASH_CHUNK_SIZE = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+def default_cache_dir() -> str:
+    """Carpeta de caché por defecto (se puede cambiar con PDF_CONVERTER_CACHE)."""
+    if os.environ.get("PDF_CONVERTER_CACHE"):
+        return os.environ["PDF_CONVERTER_CACHE"]
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+        return os.path.join(base, "pdf_converter", "cache")
+    return os.path.join(os.path.expanduser("~"), ".cache", "pdf_converter")
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    """Cerrojo exclusivo entre procesos sobre el archivo `path` (se crea si no existe)."""
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            # LK_LOCK reintenta durante unos 10 s antes de fallar con OSError
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def file_digest(path: str) -> str:
+    """
+    Hash BLAKE2b del contenido de un archivo, leído por bloques en un búfer
+    reutilizable (memoria constante, sin copias por bloque).
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    buffer = bytearray(HASH_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+class ResultCache:
+    """
+    Caché de resultados de conversión. Uso típico:
+
+        key = cache.key(pdf_path, "pdf_to_jpg", {"dpi": 300})
+        if cache.restore(key, output_folder, pdf_name):
+            return
+        ... convertir ...
+        cache.store(key, output_paths, pdf_name)
+
+    Los archivos se guardan sin el nombre del PDF de entrada (solo el sufijo),
+    para restaurarlos con el nombre del PDF que se está convirtiendo.
+
+    hits, misses y bytes_saved cuentan los accesos de esta instancia; stats()
+    devuelve los acumulados de todas las ejecuciones.
+    """
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.entries_dir = os.path.join(self.cache_dir, "entries")
+        self.stats_path = os.path.join(self.cache_dir, "stats.json")
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        os.makedirs(self.entries_dir, exist_ok=True)
+
+    def key(self, input_path: str, operation: str, params: dict) -> str:
+        """Clave = hash(contenido de la entrada + operación + parámetros)."""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(file_digest(input_path).encode())
+        digest.update(json.dumps({"operation": operation, **params}, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.entries_dir, key)
+
+    def _read_manifest(self, key: str):
+        try:
+            with open(os.path.join(self._entry_dir(key), "manifest.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path: str, data: dict) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def restore(self, key: str, output_folder: str, name: str) -> list:
+        """
+        Si la clave está en caché, copia sus archivos a output_folder con el
+        prefijo `name` y devuelve sus rutas; si no, devuelve una lista vacía.
+        Un fallo al leer la caché cuenta como fallo de caché, no como error.
+        """
+        manifest = self._read_manifest(key)
+        entry_dir = self._entry_dir(key)
+        if manifest is None or not all(
+            os.path.isfile(os.path.join(entry_dir, suffix)) for suffix in manifest["files"]
+        ):
+            self._update_stats(misses=1)
+            return []
+
+        restored = []
+        try:
+            for suffix in manifest["files"]:
+                output_path = os.path.join(output_folder, f"{name}{suffix}")
+                shutil.copyfile(os.path.join(entry_dir, suffix), output_path)
+                restored.append(output_path)
+        except OSError as e:
+            logger.warning("No se pudo restaurar %s desde la caché: %s", key, e)
+            self._update_stats(misses=1)
+            return []
+
+        manifest["last_used"] = time.time()
+        self._write_json(os.path.join(entry_dir, "manifest.json"), manifest)
+        self._update_stats(hits=1, bytes_saved=manifest["bytes"])
+        return restored
+
+    def store(self, key: str, output_paths: list, name: str) -> None:
+        """
+        Guarda en caché los archivos generados (cuyo nombre empieza por `name`).
+        Un fallo al escribir en la caché no afecta a la conversión.
+        """
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.{os.getpid()}.tmp"
+        try:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+
+            files = []
+            total = 0
+            for output_path in output_paths:
+                suffix = os.path.basename(output_path)[len(name):]
+                shutil.copyfile(output_path, os.path.join(tmp_dir, suffix))
+                files.append(suffix)
+                total += os.path.getsize(output_path)
+
+            self._write_json(os.path.join(tmp_dir, "manifest.json"),
+                             {"files": files, "bytes": total, "last_used": time.time()})
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+            self.evict()
+        except OSError as e:
+            logger.warning("No se pudo guardar %s en la caché: %s", key, e)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def evict(self) -> None:
+        """Elimina las entradas menos usadas hasta quedar por debajo de max_bytes."""
+        entries = []
+        for key in os.listdir(self.entries_dir):
+            if key.endswith(".tmp"):
+                continue
+            manifest = self._read_manifest(key)
+            if manifest is not None:
+                entries.append((manifest["last_used"], manifest["bytes"], key))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            total -= size
+
+    def _update_stats(self, hits: int = 0, misses: int = 0, bytes_saved: int = 0) -> None:
+        """
+        Suma los contadores a los de la instancia y a stats.json. La lectura y
+        la escritura de stats.json se hacen bajo un cerrojo entre procesos,
+        para que varios procesos (cli --jobs N) no se pisen los contadores.
+        """
+        self.hits += hits
+        self.misses += misses
+        self.bytes_saved += bytes_saved
+        try:
+            with _file_lock(f"{self.stats_path}.lock"):
+                stats = self.stats()
+                stats["hits"] += hits
+                stats["misses"] += misses
+                stats["bytes_saved"] += bytes_saved
+                self._write_json(self.stats_path, stats)
+        except OSError as e:
+            logger.warning("No se pudieron actualizar las estadísticas de la caché: %s", e)
+
+    def counters(self) -> dict:
+        """Aciertos, fallos y bytes ahorrados de esta instancia."""
+        return {"hits": self.hits, "misses": self.misses, "bytes_saved": self.bytes_saved}
+
+    def stats(self) -> dict:
+        """Estadísticas acumuladas: aciertos, fallos y bytes ahorrados."""
+        try:
+            with open(self.stats_path, encoding="utf-8") as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            stats = {}
+        return {key: stats.get(key, 0) for key in ("hits", "misses", "bytes_saved")}
+
+    def report(self, stats: dict = None) -> str:
+        """Resumen legible de las estadísticas (por defecto, las acumuladas)."""
+        stats = stats if stats is not None else self.stats()
+        lookups = stats["hits"] + stats["misses"]
+        rate = stats["hits"] / lookups * 100 if lookups else 0
+        return (
+            f"Caché: {stats['hits']} aciertos, {stats['misses']} fallos ({rate:.0f}% de aciertos), "
+            f"{stats['bytes_saved'] / 1024 ** 2:.1f} MB restaurados sin convertir"
+        )
@@ -0,0 +1,243 @@
+# searchable_pdf.py
+
+"""
+PDF buscable: el PDF original con una capa de texto invisible (OCR).
+
+Para quien solo necesita poder buscar y copiar el texto de un escaneo,
+construir un .docx es lento y genera un archivo mucho mayor. Aquí las páginas
+sin texto se reconocen con Tesseract (salida TSV, con la caja de cada
+palabra) y cada palabra se escribe sobre la página en modo de render 3
+(invisible), alineada con la palabra escaneada. El resto del PDF no cambia:
+las imágenes de las páginas no se decodifican para reescribirlas ni se
+recomprimen, solo se añade un flujo de contenido por página.
+"""
+
+import csv
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+import dialogs
+from tracing import NULL_TRACER
+from pdf_to_word import (
+    OCR_LANG, OCR_CONFIG, TESSERACT_CMD, classify_page, _needs_ocr, full_page_image,
+    EMBEDDED_OCR_FORMATS, _embedded_ocr_size, _decode_for_ocr, _ocr_pixmap,
+)
+
+# Fuente de la capa de texto (Helvetica estándar: no se incrusta)
+TEXT_LAYER_FONT = "helv"
+# Confianza mínima (0-100) de Tesseract para escribir una palabra
+MIN_WORD_CONFIDENCE = 0
+
+def _ocr_data(img) -> str:
+    """TSV de Tesseract (palabras y sus cajas) de una imagen PIL."""
+    from ocr_backend import get_backend
+    return get_backend(OCR_LANG, OCR_CONFIG, TESSERACT_CMD).image_to_data(img)
+
+def parse_tsv(tsv: str) -> list:
+    """[(left, top, width, height, texto)] de las palabras de la salida TSV de Tesseract."""
+    words = []
+    for row in csv.DictReader(io.StringIO(tsv), delimiter="\t", quoting=csv.QUOTE_NONE):
+        text = (row.get("text") or "").strip()
+        if row["level"] != "5" or not text or float(row["conf"]) < MIN_WORD_CONFIDENCE:
+            continue
+        words.append((int(row["left"]), int(row["top"]), int(row["width"]), int(row["height"]), text))
+    return words
+
+def add_text_layer(page, words: list, image_size: tuple, area=None) -> int:
+    """
+    Escribe las palabras (en píxeles de una imagen de image_size que cubre
+    `area` de la página visible, por defecto la página entera) como texto
+    invisible, en un único flujo de contenido. Cada palabra toma la altura
+    de su caja y se estira en horizontal hasta su ancho, de modo que la
+    selección coincide con el escaneo. Devuelve las palabras escritas.
+    """
+    area = fitz.Rect(area or page.rect)
+    scale_x = area.width / image_size[0]
+    scale_y = area.height / image_size[1]
+    # Las cajas están en coordenadas de la página visible (girada); el
+    # texto se escribe en las de la página sin girar, con el mismo giro
+    derotate = page.derotation_matrix
+    rotation = fitz.Matrix(page.rotation)
+    # Font.text_length mide bien los caracteres no ASCII (fitz.get_text_length no)
+    font = fitz.Font(TEXT_LAYER_FONT)
+    shape = page.new_shape()
+    written = 0
+    for left, top, width, height, text in words:
+        box_width = width * scale_x
+        fontsize = height * scale_y
+        if box_width <= 0 or fontsize <= 0:
+            continue
+        text_width = font.text_length(text, fontsize=fontsize)
+        if text_width <= 0:
+            continue
+        baseline = fitz.Point(area.x0 + left * scale_x, area.y0 + (top + height) * scale_y) * derotate
+        stretch = rotation * fitz.Matrix(box_width / text_width, 1) * ~rotation
+        shape.insert_text(baseline, text, fontname=TEXT_LAYER_FONT, fontsize=fontsize, render_mode=3,
+                          rotate=page.rotation, morph=(baseline, stretch))
+        written += 1
+    if written:
+        shape.commit()
+    return written
+
+def pdf_to_searchable_pdf(pdf_path: str, output_folder: str, ocr_workers: int = None, progress=None,
+                          cancel_event=None, ocr_cache=None, ocr_embedded: bool = True,
+                          tracer=None) -> None:
+    """
+    Guarda {nombre}_ocr.pdf en output_folder: el PDF original con una capa de
+    texto invisible en las páginas escaneadas (las que no están vacías y no
+    tienen texto extraíble; las páginas con texto se dejan como están).
+    - Las páginas se reconocen en paralelo en ocr_workers hilos (por
+      defecto, uno por núcleo); la capa de cada página se escribe en el hilo
+      principal según llegan los resultados.
+    - Con ocr_embedded, las páginas que son un único escaneo se reconocen
+      sobre la imagen incrustada (ver pdf_to_word.full_page_image), sin
+      rasterizar la página.
+    - progress(hechas, total) se llama tras cada página.
+    - Si cancel_event (threading.Event) se activa, la conversión se detiene
+      y no se guarda el PDF.
+    - ocr_cache (ocr_cache.OcrCache): reutiliza el TSV de páginas ya
+      reconocidas.
+    - tracer (tracing.Tracer): tiempo de cada etapa por página.
+    """
+    if tracer is None:
+        tracer = NULL_TRACER
+
+    try:
+        pdf_document = fitz.open(pdf_path)
+    except Exception as e:
+        dialogs.showerror("Error", f"No se pudo abrir el PDF.\n{e}")
+        return
+
+    pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    output_path = os.path.join(output_folder, f"{pdf_name}_ocr.pdf")
+    total_pages = len(pdf_document)
+    ocr_workers = ocr_workers or os.cpu_count() or 1
+    ocr_config = f"{OCR_CONFIG}|tsv"
+    done = 0
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    def page_done():
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(done, total_pages)
+
+    def ocr_page(source, size, page_number):
+        # source es una imagen PIL o los bytes de la imagen incrustada
+        if isinstance(source, bytes):
+            with tracer.stage("decode_image", page_number) as stage:
+                stage.bytes = len(source)
+                source = _decode_for_ocr(source, size)
+        with tracer.stage("ocr", page_number) as stage:
+            tsv = _ocr_data(source)
+            stage.bytes = len(tsv)
+        return tsv
+
+    # Página -> (clave de caché, tamaño de la imagen reconocida, zona de la página que cubre)
+    ocr_pages = {}
+    futures = {}
+    pending = set()
+
+    def write_layer(page_number, tsv):
+        key, size, area = ocr_pages.pop(page_number)
+        if ocr_cache is not None and key is not None:
+            ocr_cache.put(key, tsv)
+        page = pdf_document.load_page(page_number)
+        with tracer.stage("text_layer", page_number) as stage:
+            stage.bytes = add_text_layer(page, parse_tsv(tsv), size, area)
+        page_done()
+
+    def collect(future):
+        page_number = futures.pop(future)
+        try:
+            tsv = future.result()
+        except Exception as e:
+            ocr_pages.pop(page_number, None)
+            dialogs.showerror("Error", f"OCR falló en la página {page_number + 1}.\n{e}")
+            page_done()
+            return
+        write_layer(page_number, tsv)
+
+    with ThreadPoolExecutor(max_workers=ocr_workers) as executor:
+        for page_number in range(total_pages):
+            if cancelled():
+                break
+            page = pdf_document.load_page(page_number)
+            page_type = classify_page(page)
+            text = "" if page_type in ("image", "empty") else page.get_text()
+            if page_type == "empty" or not _needs_ocr(page_type, text):
+                page_done()
+                continue
+
+            try:
+                source = None
+                image_info = full_page_image(page) if ocr_embedded else None
+                if image_info is not None:
+                    with tracer.stage("extract_image", page_number) as stage:
+                        base_image = pdf_document.extract_image(image_info["xref"])
+                        stage.bytes = len(base_image["image"])
+                    if base_image["ext"] in EMBEDDED_OCR_FORMATS:
+                        source = base_image["image"]
+                        size = _embedded_ocr_size(page, image_info)
+                        area = fitz.Rect(image_info["bbox"])
+                        key_args = (source, size[0], size[1], 0, OCR_LANG, f"{ocr_config}|embedded")
+                if source is None:
+                    with tracer.stage("get_pixmap", page_number) as stage:
+                        pix = _ocr_pixmap(page)
+                        stage.bytes = len(pix.samples_mv)
+                    size = (pix.width, pix.height)
+                    area = page.rect
+                    key_args = (pix.samples_mv, pix.width, pix.height, pix.n, OCR_LANG, ocr_config)
+                    source = Image.frombytes("L", size, pix.samples)
+                    del pix
+
+                key = ocr_cache.key(*key_args) if ocr_cache is not None else None
+                ocr_pages[page_number] = (key, size, area)
+                cached_tsv = ocr_cache.get(key) if key is not None else None
+                if cached_tsv is not None:
+                    write_layer(page_number, cached_tsv)
+                    continue
+            except Exception as e:
+                ocr_pages.pop(page_number, None)
+                dialogs.showerror("Error", f"OCR falló en la página {page_number + 1}.\n{e}")
+                page_done()
+                continue
+
+            if len(pending) >= 2 * ocr_workers:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    collect(future)
+            future = executor.submit(ocr_page, source, size, page_number)
+            futures[future] = page_number
+            pending.add(future)
+
+        for future in as_completed(pending):
+            if cancelled():
+                for remaining in pending:
+                    remaining.cancel()
+                break
+            collect(future)
+
+    if cancelled():
+        pdf_document.close()
+        dialogs.showwarning("Cancelado", "Conversión cancelada. No se ha guardado el PDF.")
+        return
+
+    try:
+        # deflate solo comprime los flujos sin filtro (las capas de texto
+        # nuevas); las imágenes se copian tal cual
+        with tracer.stage("save") as stage:
+            pdf_document.save(output_path, garbage=1, deflate=True)
+            if tracer.enabled:
+                stage.bytes = os.path.getsize(output_path)
+        dialogs.showinfo("Proceso completado", f"PDF buscable guardado en:\n{output_path}")
+    except Exception as e:
+        dialogs.showerror("Error", f"No se pudo guardar el PDF.\n{e}")
+    finally:
+        pdf_document.close()
@@ -0,0 +1,114 @@
+# startup_report.py
+
+"""
+Informe de tiempo de arranque de la aplicación.
+
+Mide, cada cosa en un intérprete nuevo:
+1) Los módulos más costosos de importar (python -X importtime).
+2) Qué librerías pesadas se cargan al arrancar (no debería cargarse ninguna).
+3) El tiempo hasta que la ventana está en pantalla (si hay pantalla disponible).
+
+Uso:
+    python startup_report.py [--module main] [--budget 1.0] [--top 15]
+
+Termina con código 1 si se carga alguna librería pesada al arrancar o si la
+ventana tarda más que el presupuesto, para detectar regresiones.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Librerías que solo deben cargarse al ejecutar una conversión
+HEAVY_MODULES = ["fitz", "pymupdf", "docx", "lxml", "pytesseract", "PIL"]
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def _python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=HERE, capture_output=True, text=True,
+    )
+
+def import_times(module: str) -> list:
+    """
+    Devuelve [(módulo, self_us, cumulative_us)] de todos los módulos importados
+    al cargar `module`, ordenados por tiempo acumulado (de mayor a menor).
+    """
+    result = _python(f"import {module}", "-X", "importtime")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return sorted(rows, key=lambda row: row[2], reverse=True)
+
+def heavy_modules_loaded(module: str) -> list:
+    """Librerías pesadas presentes en sys.modules después de importar `module`."""
+    code = (
+        f"import sys, json, {module}\n"
+        f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))"
+    )
+    result = _python(code)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return json.loads(result.stdout)
+
+def window_time(module: str):
+    """
+    Segundos desde el lanzamiento del intérprete hasta que la ventana principal
+    se ha dibujado, o None si no hay pantalla.
+    """
+    code = (
+        f"import {module}\n"
+        f"app = {module}.AppUnificada()\n"
+        "app.update()\n"
+        "app.destroy()\n"
+    )
+    start = time.perf_counter()
+    result = _python(code)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        return None
+    return elapsed
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Informe de tiempo de arranque.")
+    parser.add_argument("--module", default="main", help="Módulo de la aplicación (por defecto main).")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="Segundos máximos hasta mostrar la ventana (por defecto 1.0).")
+    parser.add_argument("--top", type=int, default=15, help="Módulos a listar (por defecto 15).")
+    args = parser.parse_args(argv)
+    failed = False
+
+    rows = import_times(args.module)
+    total = next((cumulative for name, _, cumulative in rows if name == args.module), 0)
+    print(f"Importación de '{args.module}': {total / 1000:.1f} ms")
+    print(f"{'módulo':<40} {'propio (ms)':>12} {'acumulado (ms)':>15}")
+    for name, self_us, cumulative_us in rows[:args.top]:
+        print(f"{name:<40} {self_us / 1000:>12.1f} {cumulative_us / 1000:>15.1f}")
+
+    heavy = heavy_modules_loaded(args.module)
+    if heavy:
+        failed = True
+        print(f"\nERROR: librerías pesadas cargadas al arrancar: {', '.join(heavy)}")
+    else:
+        print("\nNinguna librería pesada se carga al arrancar.")
+
+    seconds = window_time(args.module)
+    if seconds is None:
+        print("Sin pantalla disponible: no se mide el tiempo hasta mostrar la ventana.")
+    else:
+        print(f"Ventana en pantalla en {seconds:.2f} s (presupuesto {args.budget:.2f} s)")
+        if seconds > args.budget:
+            failed = True
+            print("ERROR: se ha superado el presupuesto de arranque.")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
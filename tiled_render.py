@@ -0,0 +1,275 @@
+# tiled_render.py
+
+"""
+Renderizado por franjas y teselas para exportar páginas a muy alta resolución.
+
+pdf_to_jpg crea el pixmap de la página entera de una vez: un plano A0 a
+600 DPI son ~20.000 x 28.000 píxeles (más de 1,6 GB en RGB). Aquí la página
+se renderiza por trozos con get_pixmap(clip=...) y cada trozo se escribe y se
+libera antes de renderizar el siguiente, así que la memoria depende del tamaño
+de la franja, no del de la página.
+
+Dos salidas:
+- pdf_to_tiff: un TIFF por página, escrito franja a franja (cada franja es un
+  "strip" comprimido con deflate). Si el TIFF puede superar 4 GB se escribe
+  en formato BigTIFF.
+- pdf_to_tiles: una pirámide de teselas JPG por página (nivel 0 = resolución
+  completa, cada nivel siguiente a la mitad), con un tiles.json que la
+  describe, para visores de tipo mapa.
+"""
+
+import json
+import math
+import os
+import struct
+import zlib
+
+import fitz  # PyMuPDF
+import dialogs
+
+# Alto por defecto de cada franja en píxeles
+DEFAULT_STRIP_HEIGHT = 256
+DEFAULT_TILE_SIZE = 256
+
+# Tipos de campo TIFF y formato struct de cada elemento (un RATIONAL son dos LONG)
+_SHORT, _LONG, _RATIONAL, _LONG8 = 3, 4, 5, 16
+_FIELD_FORMATS = {_SHORT: "H", _LONG: "I", _RATIONAL: "I", _LONG8: "Q"}
+
+def render_strips(page, dpi: int, strip_height: int = DEFAULT_STRIP_HEIGHT, grayscale: bool = False):
+    """
+    Genera (y, pixmap) con franjas horizontales consecutivas de la página
+    renderizada a `dpi`. Las franjas coinciden con las filas correspondientes
+    del pixmap de la página completa (salvo diferencias de ±1 en el suavizado
+    del texto que cruza el borde entre franjas).
+    """
+    zoom = dpi / 72
+    matrix = fitz.Matrix(zoom, zoom)
+    rect = page.rect
+    width, height = page_pixel_size(page, dpi)
+    for y in range(0, height, strip_height):
+        y_end = min(y + strip_height, height)
+        clip = fitz.Rect(rect.x0, rect.y0 + y / zoom, rect.x1, rect.y0 + y_end / zoom)
+        pix = page.get_pixmap(matrix=matrix, clip=clip, colorspace=fitz.csGRAY if grayscale else fitz.csRGB)
+        if pix.width != width or pix.height != y_end - y:
+            raise RuntimeError(
+                f"La franja {y}-{y_end} tiene {pix.width}x{pix.height} píxeles "
+                f"(se esperaban {width}x{y_end - y})."
+            )
+        yield y, pix
+
+def page_pixel_size(page, dpi: int) -> tuple:
+    """(ancho, alto) en píxeles de la página renderizada a `dpi`, sin renderizarla."""
+    zoom = dpi / 72
+    irect = (page.rect * fitz.Matrix(zoom, zoom)).irect
+    return irect.width, irect.height
+
+class StripTiffWriter:
+    """
+    Escribe un TIFF RGB (o gris) de 8 bits por franjas, sin tener la imagen
+    completa en memoria:
+
+        with StripTiffWriter(path, width, height, 3, rows_per_strip, dpi) as tiff:
+            for y, pix in render_strips(page, dpi, rows_per_strip):
+                tiff.write_strip(pix.samples_mv)
+
+    Los datos de cada franja se comprimen con deflate y se escriben en cuanto
+    llegan; el directorio (IFD) con las posiciones de las franjas se escribe
+    al final y la cabecera se actualiza para apuntar a él.
+    """
+
+    def __init__(self, path: str, width: int, height: int, channels: int, rows_per_strip: int,
+                 dpi: int = 72, compress_level: int = 6, bigtiff: bool = None):
+        if channels not in (1, 3):
+            raise ValueError("Solo se admiten imágenes de 1 (gris) o 3 (RGB) canales.")
+        self.path = path
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.rows_per_strip = rows_per_strip
+        self.dpi = dpi
+        self.compress_level = compress_level
+        self.strip_offsets = []
+        self.strip_byte_counts = []
+        # Sin comprimir, la imagen ocupa width * height * channels; si eso no
+        # cabe con holgura en offsets de 32 bits se usa BigTIFF
+        if bigtiff is None:
+            bigtiff = width * height * channels > 0xF0000000
+        self.bigtiff = bigtiff
+        self._file = open(path, "wb")
+        if self.bigtiff:
+            self._file.write(b"II" + struct.pack("<HHHQ", 43, 8, 0, 0))
+        else:
+            self._file.write(b"II" + struct.pack("<HI", 42, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+    def write_strip(self, samples) -> None:
+        """Añade la siguiente franja (bytes o memoryview de rows_per_strip filas)."""
+        data = zlib.compress(samples, self.compress_level)
+        self.strip_offsets.append(self._file.tell())
+        self.strip_byte_counts.append(len(data))
+        self._file.write(data)
+
+    def close(self) -> None:
+        expected = math.ceil(self.height / self.rows_per_strip)
+        if len(self.strip_offsets) != expected:
+            self._file.close()
+            raise ValueError(f"Se escribieron {len(self.strip_offsets)} franjas de {expected}.")
+
+        offset_type = _LONG8 if self.bigtiff else _LONG
+        inline_size = 8 if self.bigtiff else 4
+
+        # (etiqueta, tipo, valores); los tipos RATIONAL van como [numerador, denominador]
+        entries = [
+            (256, _LONG, [self.width]),
+            (257, _LONG, [self.height]),
+            (258, _SHORT, [8] * self.channels),
+            (259, _SHORT, [8]),  # Compresión deflate (Adobe)
+            (262, _SHORT, [2 if self.channels == 3 else 1]),
+            (273, offset_type, self.strip_offsets),
+            (277, _SHORT, [self.channels]),
+            (278, _LONG, [self.rows_per_strip]),
+            (279, offset_type, self.strip_byte_counts),
+            (282, _RATIONAL, [self.dpi, 1]),
+            (283, _RATIONAL, [self.dpi, 1]),
+            (284, _SHORT, [1]),
+            (296, _SHORT, [2]),  # Resolución en pulgadas
+        ]
+
+        # Los valores que no caben en la entrada se escriben antes del IFD
+        fields = []
+        for tag, field_type, values in entries:
+            count = len(values) // 2 if field_type == _RATIONAL else len(values)
+            data = struct.pack(f"<{len(values)}{_FIELD_FORMATS[field_type]}", *values)
+            if len(data) <= inline_size:
+                value = data.ljust(inline_size, b"\0")
+            else:
+                if self._file.tell() % 2:
+                    self._file.write(b"\0")
+                value = struct.pack("<Q" if self.bigtiff else "<I", self._file.tell())
+                self._file.write(data)
+            fields.append((tag, field_type, count, value))
+
+        if self._file.tell() % 2:
+            self._file.write(b"\0")
+        ifd_offset = self._file.tell()
+        if self.bigtiff:
+            self._file.write(struct.pack("<Q", len(fields)))
+            for tag, field_type, count, value in fields:
+                self._file.write(struct.pack("<HHQ", tag, field_type, count) + value)
+            self._file.write(struct.pack("<Q", 0))
+            self._file.seek(8)
+            self._file.write(struct.pack("<Q", ifd_offset))
+        else:
+            if ifd_offset > 0xFFFFFFFF:
+                self._file.close()
+                raise ValueError("El TIFF supera 4 GB y no se escribió como BigTIFF.")
+            self._file.write(struct.pack("<H", len(fields)))
+            for tag, field_type, count, value in fields:
+                self._file.write(struct.pack("<HHI", tag, field_type, count) + value)
+            self._file.write(struct.pack("<I", 0))
+            self._file.seek(4)
+            self._file.write(struct.pack("<I", ifd_offset))
+        self._file.close()
+
+def render_page_tiff(page, output_path: str, dpi: int, strip_height: int = DEFAULT_STRIP_HEIGHT,
+                     grayscale: bool = False) -> None:
+    """Renderiza una página en un TIFF por franjas (memoria acotada por la franja)."""
+    width, height = page_pixel_size(page, dpi)
+    channels = 1 if grayscale else 3
+    with StripTiffWriter(output_path, width, height, channels, strip_height, dpi) as tiff:
+        for y, pix in render_strips(page, dpi, strip_height, grayscale):
+            tiff.write_strip(pix.samples_mv)
+            del pix
+
+def render_page_tiles(page, output_folder: str, dpi: int, tile_size: int = DEFAULT_TILE_SIZE,
+                      quality: int = 90) -> dict:
+    """
+    Renderiza una página como pirámide de teselas JPG en output_folder:
+        {nivel}/{columna}_{fila}.jpg   (nivel 0 = resolución completa)
+        tiles.json                     tamaño, teselas y niveles
+    Cada nivel se renderiza desde el PDF (no se reduce el nivel anterior), una
+    fila de teselas cada vez. Devuelve la descripción escrita en tiles.json.
+    """
+    # Pillow solo se necesita para escribir las teselas JPG
+    from PIL import Image
+
+    width, height = page_pixel_size(page, dpi)
+    levels = max(1, math.ceil(math.log2(max(width, height) / tile_size)) + 1)
+    for level in range(levels):
+        level_dpi = dpi / 2 ** level
+        level_folder = os.path.join(output_folder, str(level))
+        os.makedirs(level_folder, exist_ok=True)
+        for y, pix in render_strips(page, level_dpi, tile_size):
+            img = Image.frombuffer("RGB", (pix.width, pix.height), pix.samples_mv, "raw", "RGB", pix.stride, 1)
+            row = y // tile_size
+            for column, x in enumerate(range(0, pix.width, tile_size)):
+                tile = img.crop((x, 0, min(x + tile_size, pix.width), pix.height))
+                tile.save(os.path.join(level_folder, f"{column}_{row}.jpg"), "JPEG", quality=quality)
+            del img, pix
+
+    description = {
+        "width": width, "height": height, "dpi": dpi,
+        "tile_size": tile_size, "levels": levels, "format": "jpg",
+    }
+    with open(os.path.join(output_folder, "tiles.json"), "w", encoding="utf-8") as f:
+        json.dump(description, f, indent=2)
+    return description
+
+def pdf_to_tiff(pdf_path: str, output_folder: str, dpi: int = 600, strip_height: int = DEFAULT_STRIP_HEIGHT,
+                grayscale: bool = False, tiles: bool = False, tile_size: int = DEFAULT_TILE_SIZE,
+                progress=None, cancel_event=None) -> None:
+    """
+    Exporta cada página de un PDF a alta resolución con memoria acotada.
+    - Por defecto, un TIFF por página ({nombre}_page_{n}.tif) escrito por
+      franjas de strip_height filas.
+    - Si tiles = True, una pirámide de teselas por página en la carpeta
+      {nombre}_page_{n}_tiles.
+    - progress(hechas, total) se llama tras cada página.
+    - Si cancel_event (threading.Event) se activa, la exportación se detiene
+      en el siguiente límite de página.
+    """
+    try:
+        pdf_document = fitz.open(pdf_path)
+    except Exception as e:
+        dialogs.showerror("Error", f"No se pudo abrir el PDF.\n{e}")
+        return
+
+    total_pages = len(pdf_document)
+    pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    done = 0
+
+    for page_number in range(total_pages):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        page = pdf_document.load_page(page_number)
+        try:
+            if tiles:
+                tiles_folder = os.path.join(output_folder, f"{pdf_name}_page_{page_number + 1}_tiles")
+                render_page_tiles(page, tiles_folder, dpi, tile_size)
+            else:
+                output_path = os.path.join(output_folder, f"{pdf_name}_page_{page_number + 1}.tif")
+                render_page_tiff(page, output_path, dpi, strip_height, grayscale)
+        except Exception as e:
+            dialogs.showerror("Error", f"No se pudo convertir la página {page_number + 1}.\n{e}")
+        done += 1
+        if progress is not None:
+            progress(done, total_pages)
+
+    pdf_document.close()
+
+    if cancel_event is not None and cancel_event.is_set():
+        dialogs.showwarning("Cancelado", f"Conversión cancelada.\nPáginas convertidas: {done} de {total_pages}.")
+        return
+
+    dialogs.showinfo(
+        "Proceso completado",
+        f"Páginas exportadas en la carpeta:\n{output_folder}"
+    )
@@ -0,0 +1,153 @@
+# tracing.py
+
+"""
+Instrumentación por página y por etapa de las conversiones.
+
+Las funciones de conversión aceptan tracer=None. Con un Tracer, cada etapa
+(get_text, get_pixmap, ocr, extract_image, add_picture, encode, save...) se
+mide y se registra como TraceRecord(source, page, stage, seconds, bytes):
+
+    tracer = Tracer()
+    pdf_to_word(pdf_path, output_folder, use_ocr=True, tracer=tracer)
+    tracer.write("traza.csv")     # o .json
+    print(tracer.summary())      # etapas que más tiempo suman y páginas más lentas
+
+Sin tracer se usa NULL_TRACER, cuyas etapas no miden ni guardan nada.
+page es el número de página en base 0 (None para las etapas del documento
+entero, como save) y bytes lo que produjo la etapa (píxeles renderizados,
+tamaño del archivo escrito, caracteres de texto...).
+"""
+
+import csv
+import json
+import time
+from collections import defaultdict, namedtuple
+
+TraceRecord = namedtuple("TraceRecord", "source page stage seconds bytes")
+
+class _Stage:
+    """Medición de una etapa en curso (ver Tracer.stage)."""
+
+    __slots__ = ("tracer", "name", "page", "bytes", "start")
+
+    def __init__(self, tracer, name, page):
+        self.tracer = tracer
+        self.name = name
+        self.page = page
+        self.bytes = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.add(self.name, time.perf_counter() - self.start, self.page, self.bytes)
+
+class _NullStage:
+    __slots__ = ("bytes",)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+class NullTracer:
+    """Tracer desactivado: no mide ni guarda nada."""
+
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name, page=None):
+        return self._stage
+
+    def add(self, stage, seconds, page=None, nbytes=0):
+        pass
+
+    def extend(self, records):
+        pass
+
+NULL_TRACER = NullTracer()
+
+class Tracer:
+    """
+    Registro de tiempos por etapa. Se puede usar desde varios hilos (añadir a
+    una lista es atómico); los procesos de un pool devuelven sus registros y
+    el proceso principal los incorpora con extend().
+    """
+
+    enabled = True
+
+    def __init__(self, source: str = None):
+        self.source = source
+        self.records = []
+
+    def stage(self, name: str, page: int = None) -> _Stage:
+        """
+        Context manager que mide una etapa; se puede asignar .bytes dentro
+        (si calcularlo cuesta algo, solo con tracer.enabled):
+
+            with tracer.stage("encode", page_number) as stage:
+                path = encode(...)
+                if tracer.enabled:
+                    stage.bytes = os.path.getsize(path)
+        """
+        return _Stage(self, name, page)
+
+    def add(self, stage: str, seconds: float, page: int = None, nbytes: int = 0) -> None:
+        """Registra una etapa medida por otros medios."""
+        self.records.append(TraceRecord(self.source, page, stage, seconds, nbytes))
+
+    def extend(self, records) -> None:
+        """
+        Añade registros de otro tracer (p. ej. de un proceso del pool); los
+        que no tienen source toman el de este tracer.
+        """
+        for record in records:
+            record = TraceRecord(*record)
+            self.records.append(record if record.source is not None else record._replace(source=self.source))
+
+    def write(self, path: str) -> None:
+        """Guarda los registros en CSV si la ruta termina en .csv, si no en JSON."""
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(TraceRecord._fields)
+                writer.writerows(self.records)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([record._asdict() for record in self.records], f, ensure_ascii=False, indent=1)
+
+    def summary(self, top: int = 10) -> str:
+        """Resumen legible: tiempo por etapa y las `top` páginas más lentas."""
+        if not self.records:
+            return "Traza vacía."
+
+        stages = defaultdict(lambda: [0, 0.0, 0])
+        pages = defaultdict(lambda: defaultdict(float))
+        for record in self.records:
+            totals = stages[record.stage]
+            totals[0] += 1
+            totals[1] += record.seconds
+            totals[2] += record.bytes
+            if record.page is not None:
+                pages[(record.source, record.page)][record.stage] += record.seconds
+        total_seconds = sum(seconds for _, seconds, _ in stages.values()) or 1
+
+        lines = ["Etapas por tiempo total:"]
+        for name, (count, seconds, nbytes) in sorted(stages.items(), key=lambda item: -item[1][1])[:top]:
+            lines.append(
+                f"  {name:<16} {count:>6} veces {seconds:>9.3f} s {seconds / total_seconds:>5.0%}"
+                f"  media {seconds / count * 1000:>8.1f} ms  {nbytes / 1024 ** 2:>9.1f} MB"
+            )
+
+        slowest = sorted(pages.items(), key=lambda item: -sum(item[1].values()))[:top]
+        if slowest:
+            lines.append("Páginas más lentas:")
+            for (source, page), page_stages in slowest:
+                name = f"{source} p. {page + 1}" if source else f"p. {page + 1}"
+                main_stage, main_seconds = max(page_stages.items(), key=lambda item: item[1])
+                lines.append(
+                    f"  {name:<40} {sum(page_stages.values()):>8.3f} s  ({main_stage} {main_seconds:.3f} s)"
+                )
+        return "\n".join(lines)